@@ -0,0 +1,115 @@
+import random
+from decimal import Decimal
+
+# Agrégats matérialisés des films : un agrégat par groupe ('total', 'genre#<genre>', 'year#<année>') contenant
+# movie_count, rating_count, rating_sum et un histogramme des notes ('rating#<note>' -> nombre de films).
+# Toutes les mises à jour sont des ADD de deltas : elles sont commutatives et peuvent être fusionnées,
+# et l'histogramme permet de retrouver min/max exacts même après une suppression.
+# Chaque agrégat est réparti sur `STATS_SHARDS` items ('<clé>#<n>') : une écriture n'en modifie qu'un, tiré au
+# hasard, pour que les transactions ne se disputent pas toutes l'item 'total'. Les lectures somment les fragments.
+TOTAL = 'total'
+RATING_PREFIX = 'rating#'
+STATS_SHARDS = 10
+
+
+def stat_key(kind, value):
+    return f"{kind}#{value}"
+
+
+def shard_key(key, shard):
+    return f"{key}#{shard}"
+
+
+def shard_keys(key, shards=STATS_SHARDS):
+    return [shard_key(key, shard) for shard in range(shards)]
+
+
+# Clé d'agrégat d'un fragment ('genre#Drama#3' -> 'genre#Drama')
+def unshard_key(stat):
+    return stat.rpartition('#')[0]
+
+
+def _rating_key(rating):
+    # 8.8, 8.80 et Decimal('8.8') partagent la même entrée d'histogramme
+    return RATING_PREFIX + format(Decimal(str(rating)).normalize(), 'f')
+
+
+# Deltas apportés par un film (sign=1) ou par son retrait (sign=-1) : {clé d'agrégat: {attribut: delta}}
+def movie_deltas(item, sign=1):
+    if item is None:
+        return {}
+    attributes = {'movie_count': sign}
+    rating = item.get('rating')
+    if rating is not None:
+        attributes['rating_count'] = sign
+        attributes['rating_sum'] = sign * Decimal(str(rating))
+        attributes[_rating_key(rating)] = sign
+    keys = [TOTAL]
+    if item.get('genre') is not None:
+        keys.append(stat_key('genre', item['genre']))
+    if item.get('release_year') is not None:
+        keys.append(stat_key('year', item['release_year']))
+    return {key: dict(attributes) for key in keys}
+
+
+# Ajoute `deltas` à `total` (modifié en place) et le renvoie
+def merge_deltas(total, deltas):
+    for key, attributes in deltas.items():
+        current = total.setdefault(key, {})
+        for name, delta in attributes.items():
+            current[name] = current.get(name, 0) + delta
+    return total
+
+
+# Paramètres `UpdateItem` (utilisables aussi dans `TransactWriteItems`), un par agrégat modifié, chacun sur
+# un fragment tiré au hasard
+def stats_updates(table_name, deltas, shards=STATS_SHARDS):
+    updates = []
+    for key, attributes in sorted(deltas.items()):
+        attributes = [(name, delta) for name, delta in sorted(attributes.items()) if delta]
+        if not attributes:
+            continue
+        updates.append({
+            'TableName': table_name,
+            'Key': {'stat': shard_key(key, random.randrange(shards))},
+            'UpdateExpression': "ADD " + ", ".join(f"#a{i} :v{i}" for i in range(len(attributes))),
+            'ExpressionAttributeNames': {f"#a{i}": name for i, (name, _) in enumerate(attributes)},
+            'ExpressionAttributeValues': {f":v{i}": delta for i, (_, delta) in enumerate(attributes)}
+        })
+    return updates
+
+
+# Item complet d'un agrégat reconstruit (histogramme sans les notes à zéro)
+def stats_item(key, attributes):
+    item = {name: value for name, value in attributes.items() if value or not name.startswith(RATING_PREFIX)}
+    item['stat'] = key
+    return item
+
+
+# Somme des fragments (items bruts de la table) d'un agrégat, ou None s'il n'en a aucun
+def merge_shards(key, items):
+    total = {}
+    found = False
+    for item in items:
+        found = True
+        for name, value in item.items():
+            if name != 'stat':
+                total[name] = total.get(name, 0) + value
+    return stats_item(key, total) if found else None
+
+
+# Vue lisible d'un item d'agrégat : nombre de films et note moyenne, minimale et maximale
+def summarize(item):
+    item = item or {}
+    ratings = [Decimal(name[len(RATING_PREFIX):]) for name, count in item.items()
+               if name.startswith(RATING_PREFIX) and count > 0]
+    rating_count = int(item.get('rating_count', 0))
+    rating_sum = item.get('rating_sum', Decimal(0))
+    return {
+        'count': int(item.get('movie_count', 0)),
+        'rating_count': rating_count,
+        'rating_sum': rating_sum,
+        'rating_avg': rating_sum / rating_count if rating_count else None,
+        'rating_min': min(ratings) if ratings else None,
+        'rating_max': max(ratings) if ratings else None
+    }
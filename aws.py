@@ -1,27 +1,525 @@
-from boto3.session import Session
+import functools
+import heapq
+import inspect
+import logging
+import multiprocessing
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
 
+from aggregates import (TOTAL, merge_deltas, merge_shards, movie_deltas, shard_key, shard_keys, stat_key, stats_item,
+                        stats_updates, summarize, unshard_key)
+from cache import ItemCache, MISS
+from clients import get_client, get_resource
+from logs import SUCCESS, body, configure_logging, log_items
+from metrics import bind_operation
+from pagination import ResultPage, encode_cursor, decode_cursor, prefetch_pages
+from rawcodec import MovieColumns, RawTable, build_expressions
+from ratelimit import backoff_delay
+
+# Sans `configure_logging`, la bibliothèque n'écrit rien sur stdout
+logger = logging.getLogger(__name__)
+
 # Nom du profil AWS à utiliser
 PROFILE_NAME = "dev"
 TABLE_NAME = "Movies"
+# Taille maximale d'un appel BatchGetItem
+BATCH_GET_SIZE = 100
+# Table compagnon de l'index inversé des critiques : terme -> films
+REVIEW_INDEX_TABLE_NAME = "MovieReviewTerms"
+# Table des critiques déplacées hors de l'item du film en mode borné (voir `max_inline_reviews`)
+REVIEW_OVERFLOW_TABLE_NAME = "MovieReviewOverflow"
+# Agrégats matérialisés des films (comptes et notes, au total, par genre et par année), voir `aggregates`
+STATS_TABLE_NAME = "MovieStats"
+# Fréquence des logs de progression des suppressions en masse
+DELETE_PROGRESS_EVERY = 1000
+# Attente maximale de l'activation d'un GSI ajouté par `ensure_schema` (le backfill dépend de la taille de la table)
+GSI_CREATE_TIMEOUT = 3600  # secondes
+
+# Attributs de premier niveau projetés depuis `details` et `title` pour les GSIs directeur/durée/titre
+DURATION_BUCKET_SIZE = 30  # minutes
+MAX_DURATION_BUCKET = 10  # au-delà de 300 minutes, tous les films partagent le dernier bucket
+TITLE_PREFIX_LENGTH = 1
+
+# Schéma attendu de la table `Movies`, comparé à `describe_table` par `ensure_schema`
+MOVIES_KEY_SCHEMA = [
+    {
+        'AttributeName': 'movie_id',
+        'KeyType': 'HASH'  # Clé de partition
+    },
+    {
+        'AttributeName': 'release_year',
+        'KeyType': 'RANGE'  # Clé de tri
+    }
+]
+MOVIES_ATTRIBUTE_DEFINITIONS = [
+    {
+        'AttributeName': 'movie_id',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'release_year',
+        'AttributeType': 'N'
+    },
+    {
+        'AttributeName': 'genre',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'rating',
+        'AttributeType': 'N'
+    },
+    {
+        'AttributeName': 'title',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'title_prefix',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'director',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'duration',
+        'AttributeType': 'N'
+    },
+    {
+        'AttributeName': 'duration_bucket',
+        'AttributeType': 'N'
+    }
+]
+MOVIES_GSIS = [
+    {
+        'IndexName': 'GenreIndex',
+        'KeySchema': [
+            {
+                'AttributeName': 'genre',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'release_year',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    },
+    {
+        'IndexName': 'ReleaseYearRatingIndex',
+        'KeySchema': [
+            {
+                'AttributeName': 'release_year',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'rating',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    },
+    {
+        'IndexName': 'DirectorIndex',
+        'KeySchema': [
+            {
+                'AttributeName': 'director',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'release_year',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    },
+    {
+        'IndexName': 'DurationIndex',
+        'KeySchema': [
+            {
+                'AttributeName': 'duration_bucket',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'duration',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    },
+    {
+        'IndexName': 'TitlePrefixIndex',
+        'KeySchema': [
+            {
+                'AttributeName': 'title_prefix',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'title',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    }
+]
+MOVIES_PROVISIONED_THROUGHPUT = {
+    'ReadCapacityUnits': 5,
+    'WriteCapacityUnits': 5
+}
+
+# Tables (profil, région, nom) dont le schéma a déjà été vérifié dans ce processus
+_checked_schemas = set()
+
+# Requêtes GSI paginables par curseur : nom de la méthode publique -> paramètres de la requête
+INDEX_QUERIES = {
+    'query_movies_by_genre': lambda genre: {
+        'IndexName': 'GenreIndex',
+        'KeyConditionExpression': Key('genre').eq(genre)
+    },
+    'query_movies_by_genre_and_year': lambda genre, min_year: {
+        'IndexName': 'GenreIndex',
+        'KeyConditionExpression': Key('genre').eq(genre) & Key('release_year').gt(min_year)
+    },
+    'query_movies_by_release_year_gsi': lambda release_year: {
+        'IndexName': 'ReleaseYearRatingIndex',
+        'KeyConditionExpression': Key('release_year').eq(release_year)
+    },
+    'query_movies_by_rating_gsi': lambda release_year, rating: {
+        'IndexName': 'ReleaseYearRatingIndex',
+        'KeyConditionExpression': Key('release_year').eq(release_year) & Key('rating').gt(Decimal(str(rating)))
+    }
+}
+
+
+# Forme comparable d'un KeySchema, indépendante de l'ordre de la liste
+def _key_schema(key_schema):
+    return sorted((key['AttributeName'], key['KeyType']) for key in key_schema)
+
+
+def duration_bucket(duration):
+    return min(int(duration) // DURATION_BUCKET_SIZE, MAX_DURATION_BUCKET)
+
+
+# Attributs indexables dérivés de `details` (index creux : un attribut absent n'est pas indexé)
+def details_index_attributes(details):
+    attributes = {}
+    if details.get('director'):
+        attributes['director'] = details['director']
+    if details.get('duration') is not None:
+        attributes['duration'] = details['duration']
+        attributes['duration_bucket'] = duration_bucket(details['duration'])
+    return attributes
+
+
+# Clauses SET/REMOVE qui alignent les attributs projetés sur de nouveaux `details`
+def details_index_update(details):
+    attributes = details_index_attributes(details)
+    names, values, set_clauses, remove_clauses = {}, {}, [], []
+    for name in ('director', 'duration', 'duration_bucket'):
+        names[f'#{name}'] = name
+        if name in attributes:
+            set_clauses.append(f'#{name} = :{name}')
+            values[f':{name}'] = attributes[name]
+        else:
+            remove_clauses.append(f'#{name}')
+    return set_clauses, remove_clauses, names, values
+
+
+# Découpe un texte en termes normalisés pour l'index des critiques
+def review_terms(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+# Construit l'item DynamoDB d'un film, la conversion en Decimal n'est faite que si nécessaire
+def movie_to_item(movie):
+    rating = movie['rating']
+    item = {
+        'movie_id': movie['movie_id'],
+        'release_year': movie['release_year'],
+        'genre': movie['genre'],
+        'rating': rating if isinstance(rating, Decimal) else Decimal(str(rating)),
+        'details': movie['details']
+    }
+    # `title` est la clé de tri de TitlePrefixIndex : DynamoDB refuse une chaîne vide comme clé d'index,
+    # un titre vide est donc omis (le film sort de l'index, comme les autres attributs creux)
+    if movie['title']:
+        item['title'] = movie['title']
+        item['title_prefix'] = movie['title'][:TITLE_PREFIX_LENGTH]
+    item.update(details_index_attributes(movie['details']))
+    return item
+
+
+# Dépose une page dans la file partagée, en abandonnant si le consommateur s'est arrêté
+def _put_page(pages, stop, page):
+    while not stop.is_set():
+        try:
+            pages.put(page, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+# Scan d'un segment `Segment`/`TotalSegments`, chaque page est envoyée dans la file partagée
+def _scan_segment(table, segment, total_segments, page_size, scan_kwargs, pages, stop):
+    try:
+        scan_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        while not stop.is_set():
+            response = table.scan(**scan_kwargs)
+            page = {'Items': response.get('Items', []), 'Count': response.get('Count', 0)}
+            if not _put_page(pages, stop, page):
+                break
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            scan_kwargs['ExclusiveStartKey'] = last_key
+    finally:
+        # Marqueur de fin de segment (même en cas d'erreur)
+        _put_page(pages, stop, None)
+
+
+# Variante processus : chaque worker ouvre sa propre session, les objets boto3 n'étant pas picklables
+def _scan_segment_process(table_name, profile_name, region_name, client_settings, segment, total_segments, page_size,
+                          scan_kwargs, pages, stop):
+    table = get_resource('dynamodb', profile_name, region_name, **client_settings).Table(table_name)
+    _scan_segment(table, segment, total_segments, page_size, scan_kwargs, pages, stop)
+
+
+# Mesure la méthode (latence, requêtes, capacité...) quand une instrumentation est branchée
+def _instrumented(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        with self.metrics.operation(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Invalide le cache du film modifié une fois l'écriture terminée (même partiellement)
+def _invalidates_movie(method):
+    # Arguments retrouvés par nom : `insert_movie` reçoit le titre entre l'ID et l'année
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if self.cache is not None:
+                arguments = signature.bind(self, *args, **kwargs).arguments
+                self.cache.invalidate_movie(arguments['movie_id'], arguments['release_year'])
+    return wrapper
+
+
+# Vide le cache après une écriture portant sur plusieurs films
+def _invalidates_all(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if self.cache is not None:
+                self.cache.clear()
+    return wrapper
 
 
 class DynamoDB:
-    def __init__(self, table_name=TABLE_NAME, profile_name=PROFILE_NAME):
+    # schema_mode : None (aucun appel réseau à la construction), 'ensure' (crée seulement la table ou les GSIs
+    # manquants) ou 'recreate' (supprime puis recrée la table, ancien comportement des exercices)
+    # rate_limiter : `ratelimit.AdaptiveRateLimiter` optionnel, partageable entre plusieurs instances
+    # metrics : `metrics.Metrics` (ou équivalent) pour mesurer chaque opération
+    # max_inline_reviews : nombre maximal de critiques gardées dans l'item du film, les plus anciennes sont
+    # déplacées dans `REVIEW_OVERFLOW_TABLE_NAME` (None : liste non bornée)
+    # maintain_stats : tient à jour `STATS_TABLE_NAME` à chaque écriture de film (voir `get_movie_stats`), dès que
+    # cette table existe : sans elle, les films sont écrits seuls et `count_total_movies` compte par scan
+    # client_settings : réglages réseau du client (voir `clients.client_config` : pool, timeouts, reprises)
+    def __init__(self, table_name=TABLE_NAME, profile_name=PROFILE_NAME, cache_size=0, cache_ttl=60.0,
+                 schema_mode=None, rate_limiter=None, metrics=None, max_inline_reviews=None, maintain_stats=True,
+                 region_name=None, client_settings=None):
         # Exo 1 : Configurer Boto3 et accéder à la table `Movies`
-        print(f"Initialisation de l'application et de la connexion à DynamoDB avec le profil {profile_name}")
+        logger.info("Initialisation de l'application et de la connexion à DynamoDB avec le profil %s", profile_name)
         self._table_name = table_name
-        self._session = Session(profile_name=profile_name)
-        self.resource = self._session.resource('dynamodb')
-        self.client = self.resource.meta.client
-        self.table = self.resource.Table(table_name)
+        self._profile_name = profile_name
+        self._region_name = region_name
+        self._client_settings = client_settings or {}
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.max_inline_reviews = max_inline_reviews
+        self.maintain_stats = maintain_stats
+        # Cache optionnel en lecture (désactivé par défaut), les items en cache sont partagés : ne pas les modifier
+        self.cache = ItemCache(max_size=cache_size, ttl=cache_ttl) if cache_size else None
+
+        if schema_mode == 'ensure':
+            self.ensure_schema()
+        elif schema_mode == 'recreate':
+            # Vérification et création de la table si elle n'existe pas
+            if self.check_table_exists():
+                logger.info("Table %s existe déjà, suppression de la table...", self._table_name)
+                self.delete_table()
+            self.create_table_with_additional_gsi()
+            # L'index et le débordement des critiques, ainsi que les agrégats, repartent de zéro avec la table
+            for table_name in (REVIEW_INDEX_TABLE_NAME, REVIEW_OVERFLOW_TABLE_NAME, STATS_TABLE_NAME):
+                if self.check_cinema_table_exists(table_name):
+                    self.delete_cinema_table(table_name)
+            self.create_review_index_table()
+            self.create_review_overflow_table()
+            self.create_stats_table()
+
+    # Ressource et table créées au premier accès : construire un client ne coûte rien. Sans hooks propres
+    # à l'instance, le client de la ressource (et son pool de connexions) est partagé par profil/région
+    # via `clients` ; la ressource et la table restent propres à l'instance.
+    @property
+    def _shared_client(self):
+        return self.rate_limiter is None and self.metrics is None
+
+    @functools.cached_property
+    def resource(self):
+        resource = get_resource('dynamodb', self._profile_name, self._region_name, shared=self._shared_client,
+                                **self._client_settings)
+        if self.rate_limiter is not None:
+            # Toutes les requêtes (Table, batch_writer, client) passent par ce client
+            self.rate_limiter.attach(resource.meta.client)
+        if self.metrics is not None:
+            self.metrics.attach(resource.meta.client)
+        return resource
+
+    @functools.cached_property
+    def client(self):
+        return self.resource.meta.client
+
+    @functools.cached_property
+    def table(self):
+        return self.resource.Table(self._table_name)
+
+    # Client bas niveau sans la couche de transformation de la ressource : les items restent au format typé
+    @functools.cached_property
+    def raw_client(self):
+        client = get_client('dynamodb', self._profile_name, self._region_name, shared=self._shared_client,
+                            **self._client_settings)
+        if self.rate_limiter is not None:
+            self.rate_limiter.attach(client)
+        if self.metrics is not None:
+            self.metrics.attach(client)
+        return client
+
+    # Agrégats tenus seulement une fois leur table trouvée (vérifié au premier besoin, puis par `rebuild_stats`)
+    @functools.cached_property
+    def _stats_enabled(self):
+        if not self.maintain_stats:
+            return False
+        if self.check_cinema_table_exists(STATS_TABLE_NAME):
+            return True
+        logger.warning("Table %s absente : agrégats non tenus à jour (voir rebuild_stats.py)",
+                       STATS_TABLE_NAME)
+        return False
+
+    # Compare le schéma attendu à `describe_table` et ne crée que ce qui manque (résultat mis en cache)
+    def ensure_schema(self):
+        if (self._profile_name, self._region_name, self._table_name) in _checked_schemas:
+            return True
+        try:
+            logger.info("Vérification du schéma de la table %s...", self._table_name)
+            try:
+                description = self.client.describe_table(TableName=self._table_name)['Table']
+            except self.client.exceptions.ResourceNotFoundException:
+                self.create_table_with_additional_gsi()
+                self.create_review_index_table()
+                self.create_review_overflow_table()
+                self.create_stats_table()
+                _checked_schemas.add((self._profile_name, self._region_name, self._table_name))
+                return True
+
+            if _key_schema(description['KeySchema']) != _key_schema(MOVIES_KEY_SCHEMA):
+                # La clé primaire ne peut pas être modifiée sans recréer la table
+                logger.error("Erreur: la clé primaire de la table %s ne correspond pas au schéma attendu",
+                             self._table_name)
+                return False
+
+            existing = {gsi['IndexName']: gsi for gsi in description.get('GlobalSecondaryIndexes', [])}
+            for gsi in MOVIES_GSIS:
+                current = existing.get(gsi['IndexName'])
+                if current is None:
+                    self._create_gsi(gsi)
+                elif _key_schema(current['KeySchema']) != _key_schema(gsi['KeySchema']):
+                    logger.error("Erreur: le GSI %s existe avec une clé différente", gsi['IndexName'])
+                    return False
+            if not self.check_cinema_table_exists(REVIEW_INDEX_TABLE_NAME):
+                self.create_review_index_table()
+            if not self.check_cinema_table_exists(REVIEW_OVERFLOW_TABLE_NAME):
+                self.create_review_overflow_table()
+            if self.maintain_stats and not self.check_cinema_table_exists(STATS_TABLE_NAME):
+                # Table existante sans agrégats : un scan sur une table en service manquerait des écritures,
+                # leur initialisation est laissée à rebuild_stats.py (qui crée la table)
+                logger.warning("Table %s absente : lancer rebuild_stats.py sur une table calme pour initialiser "
+                               "les agrégats", STATS_TABLE_NAME)
+            _checked_schemas.add((self._profile_name, self._region_name, self._table_name))
+            logger.info("Schéma de la table %s à jour", self._table_name, extra=SUCCESS)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors de la vérification du schéma de la table: %s", e)
+            return False
 
-        # Vérification et création de la table si elle n'existe pas
-        if self.check_table_exists():
-            print(f"Table {self._table_name} existe déjà, suppression de la table...")
-            self.delete_table()
-        self.create_table_with_additional_gsi()
+    def _create_gsi(self, gsi, poll_interval=5, timeout=GSI_CREATE_TIMEOUT):
+        logger.info("Création du GSI manquant %s...", gsi['IndexName'])
+        index_attributes = {key['AttributeName'] for key in gsi['KeySchema']}
+        self.client.update_table(
+            TableName=self._table_name,
+            AttributeDefinitions=[definition for definition in MOVIES_ATTRIBUTE_DEFINITIONS
+                                  if definition['AttributeName'] in index_attributes],
+            GlobalSecondaryIndexUpdates=[{'Create': gsi}]
+        )
+        # Un seul GSI peut être en création à la fois : on attend qu'il soit actif, dans la limite de `timeout`
+        deadline = time.monotonic() + timeout
+        while True:
+            description = self.client.describe_table(TableName=self._table_name)['Table']
+            statuses = {index['IndexName']: index.get('IndexStatus')
+                        for index in description.get('GlobalSecondaryIndexes', [])}
+            if statuses.get(gsi['IndexName']) == 'ACTIVE':
+                break
+            if time.monotonic() >= deadline:
+                # La création se poursuit côté DynamoDB ; le schéma sera revérifié au prochain appel
+                raise TimeoutError(f"GSI {gsi['IndexName']} toujours {statuses.get(gsi['IndexName'])} "
+                                   f"après {timeout} s")
+            time.sleep(poll_interval)
+        logger.info("GSI %s créé avec succès", gsi['IndexName'], extra=SUCCESS)
 
     def check_table_exists(self):
         try:
@@ -34,208 +532,694 @@ class DynamoDB:
         try:
             self.table.delete()
             self.table.meta.client.get_waiter('table_not_exists').wait(TableName=self._table_name)
-            print(f"\033[92mTable {self._table_name} supprimée avec succès\033[0m")
+            logger.info("Table %s supprimée avec succès", self._table_name, extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la suppression de la table: {e}\033[0m")
+            logger.error("Erreur lors de la suppression de la table: %s", e)
 
     # Exo 16 : Ajouter un GSI sur `release_year` et `rating`
     def create_table_with_additional_gsi(self):
         try:
-            print("Début de la création de la table avec un GSI sur release_year et rating...")
+            logger.info("Début de la création de la table avec un GSI sur release_year et rating...")
             self.table = self.resource.create_table(
                 TableName=self._table_name,
-                KeySchema=[
-                    {
-                        'AttributeName': 'movie_id',
-                        'KeyType': 'HASH'  # Clé de partition
-                    },
-                    {
-                        'AttributeName': 'release_year',
-                        'KeyType': 'RANGE'  # Clé de tri
-                    }
-                ],
-                AttributeDefinitions=[
-                    {
-                        'AttributeName': 'movie_id',
-                        'AttributeType': 'S'
-                    },
-                    {
-                        'AttributeName': 'release_year',
-                        'AttributeType': 'N'
-                    },
-                    {
-                        'AttributeName': 'genre',
-                        'AttributeType': 'S'
-                    },
-                    {
-                        'AttributeName': 'rating',
-                        'AttributeType': 'N'
-                    }
-                ],
-                GlobalSecondaryIndexes=[
-                    {
-                        'IndexName': 'GenreIndex',
-                        'KeySchema': [
-                            {
-                                'AttributeName': 'genre',
-                                'KeyType': 'HASH'
-                            },
-                            {
-                                'AttributeName': 'release_year',
-                                'KeyType': 'RANGE'
-                            }
-                        ],
-                        'Projection': {
-                            'ProjectionType': 'ALL'
-                        },
-                        'ProvisionedThroughput': {
-                            'ReadCapacityUnits': 5,
-                            'WriteCapacityUnits': 5
-                        }
-                    },
-                    {
-                        'IndexName': 'ReleaseYearRatingIndex',
-                        'KeySchema': [
-                            {
-                                'AttributeName': 'release_year',
-                                'KeyType': 'HASH'
-                            },
-                            {
-                                'AttributeName': 'rating',
-                                'KeyType': 'RANGE'
-                            }
-                        ],
-                        'Projection': {
-                            'ProjectionType': 'ALL'
-                        },
-                        'ProvisionedThroughput': {
-                            'ReadCapacityUnits': 5,
-                            'WriteCapacityUnits': 5
-                        }
-                    }
-                ],
-                ProvisionedThroughput={
-                    'ReadCapacityUnits': 5,
-                    'WriteCapacityUnits': 5
-                }
+                KeySchema=MOVIES_KEY_SCHEMA,
+                AttributeDefinitions=MOVIES_ATTRIBUTE_DEFINITIONS,
+                GlobalSecondaryIndexes=MOVIES_GSIS,
+                ProvisionedThroughput=MOVIES_PROVISIONED_THROUGHPUT
             )
             self.table.meta.client.get_waiter('table_exists').wait(
                 TableName=self._table_name)
-            print(
-                f"\033[92mTable {self._table_name} créée avec succès avec GSIs sur genre et release_year-rating\033[0m")
+            logger.info("Table %s créée avec succès avec GSIs sur genre et release_year-rating",
+                        self._table_name, extra=SUCCESS)
         except self.client.exceptions.ResourceInUseException:
-            print("\033[91mErreur lors de la création de la table avec GSIs: La table existe déjà\033[0m")
+            logger.error("Erreur lors de la création de la table avec GSIs: La table existe déjà")
+        except Exception as e:
+            logger.error("Erreur lors de la création de la table avec GSIs: %s", e)
+
+    # Moteur de scan partagé : suit `LastEvaluatedKey` et renvoie les pages une par une. Les conditions `Key`/`Attr`
+    # sont traduites ici (`build_expressions`) et jamais par le client partagé, y compris dans les workers.
+    def scan_pages(self, page_size=None, total_segments=None, max_workers=None, use_processes=False, table=None,
+                   **scan_kwargs):
+        scan_kwargs = build_expressions(scan_kwargs)
+        if total_segments:
+            yield from self.parallel_scan_pages(total_segments, max_workers, use_processes, page_size, table,
+                                                **scan_kwargs)
+            return
+        table = table or self.table
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        while True:
+            response = table.scan(**scan_kwargs)
+            yield response
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            scan_kwargs['ExclusiveStartKey'] = last_key
+
+    # Générateur d'items paginé : la mémoire reste constante quelle que soit la taille de la table
+    def scan_items(self, page_size=None, limit=None, total_segments=None, max_workers=None, use_processes=False,
+                   table=None, **scan_kwargs):
+        count = 0
+        for page in self.scan_pages(page_size, total_segments, max_workers, use_processes, table, **scan_kwargs):
+            for item in page.get('Items', []):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    # Équivalent paginé pour les requêtes sur la table ou un GSI
+    def query_pages(self, page_size=None, table=None, **query_kwargs):
+        table = table or self.table
+        query_kwargs = build_expressions(query_kwargs)
+        if page_size:
+            query_kwargs['Limit'] = page_size
+        while True:
+            response = table.query(**query_kwargs)
+            yield response
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_key
+
+    def query_items(self, page_size=None, limit=None, **query_kwargs):
+        count = 0
+        for page in self.query_pages(page_size=page_size, **query_kwargs):
+            for item in page.get('Items', []):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    # Mode brut : client bas niveau et décodage rapide par page, pour les gros scans et requêtes.
+    # native_numbers renvoie des int/float au lieu de Decimal, records des `MovieRecord` au lieu de dicts.
+    def raw_table(self, native_numbers=True, records=False):
+        return RawTable(self.raw_client, self._table_name, native_numbers, records)
+
+    def raw_scan_items(self, page_size=None, limit=None, total_segments=None, max_workers=None, native_numbers=True,
+                       records=False, **scan_kwargs):
+        yield from self.scan_items(page_size, limit, total_segments, max_workers,
+                                   table=self.raw_table(native_numbers, records), **scan_kwargs)
+
+    def raw_query_items(self, page_size=None, limit=None, native_numbers=True, records=False, **query_kwargs):
+        yield from self.query_items(page_size, limit, table=self.raw_table(native_numbers, records), **query_kwargs)
+
+    # Scan complet en colonnes (`rawcodec.MovieColumns`) : tableaux compacts plutôt qu'un dict par film
+    @_instrumented
+    def raw_scan_columns(self, page_size=None, total_segments=None, max_workers=None, **scan_kwargs):
+        columns = MovieColumns()
+        for page in self.scan_pages(page_size, total_segments, max_workers, table=self.raw_table(), **scan_kwargs):
+            columns.extend(page['Items'])
+        return columns
+
+    # Export colonnaire (Parquet ou Feather, voir `export.write_movies`) : les pages sont converties en record
+    # batches au fil de l'eau, sans liste complète de dicts en mémoire
+    @_instrumented
+    def export_scan(self, path, file_format=None, page_size=None, total_segments=None, max_workers=None,
+                    **scan_kwargs):
+        from export import write_movies
+        try:
+            logger.info("Export de la table %s vers %s...", self._table_name, path)
+            rows = write_movies(self.raw_scan_items(page_size, total_segments=total_segments, max_workers=max_workers,
+                                                    **scan_kwargs), path, file_format)
+            logger.info("%s films exportés vers %s", rows, path, extra=SUCCESS)
+            return rows
+        except Exception as e:
+            logger.error("Erreur lors de l'export de la table %s: %s", self._table_name, e)
+            return None
+
+    @_instrumented
+    def export_query(self, path, file_format=None, page_size=None, **query_kwargs):
+        from export import write_movies
+        try:
+            logger.info("Export de la requête sur la table %s vers %s...", self._table_name, path)
+            rows = write_movies(self.raw_query_items(page_size, **query_kwargs), path, file_format)
+            logger.info("%s films exportés vers %s", rows, path, extra=SUCCESS)
+            return rows
+        except Exception as e:
+            logger.error("Erreur lors de l'export de la requête: %s", e)
+            return None
+
+    # Variantes exportables de `query_movies_by_genre` et `query_movies_by_release_year_gsi`, toutes pages comprises
+    def export_movies_by_genre(self, genre, path, file_format=None, page_size=None):
+        return self.export_query(path, file_format, page_size, IndexName='GenreIndex',
+                                 KeyConditionExpression=Key('genre').eq(genre))
+
+    def export_movies_by_release_year(self, release_year, path, file_format=None, page_size=None):
+        return self.export_query(path, file_format, page_size, IndexName='ReleaseYearRatingIndex',
+                                 KeyConditionExpression=Key('release_year').eq(release_year))
+
+    # Requêtes sur DurationIndex, un bucket de durée après l'autre
+    def _query_duration_buckets(self, key_condition, min_duration, max_duration, page_size, limit):
+        max_bucket = duration_bucket(max_duration) if max_duration is not None else MAX_DURATION_BUCKET
+        items = []
+        for bucket in range(duration_bucket(min_duration), max_bucket + 1):
+            remaining = limit - len(items) if limit is not None else None
+            if remaining == 0:
+                break
+            items.extend(self.query_items(
+                page_size=page_size,
+                limit=remaining,
+                IndexName='DurationIndex',
+                KeyConditionExpression=Key('duration_bucket').eq(bucket) & key_condition
+            ))
+        return items
+
+    # Outil de rattrapage : renseigne les attributs projetés des films écrits avant l'ajout des GSIs
+    @_instrumented
+    def backfill_index_attributes(self, page_size=None, total_segments=None, max_workers=8):
+        try:
+            logger.info("Rattrapage des attributs indexés de la table %s...", self._table_name)
+            count = 0
+            in_flight = set()
+            items = self.scan_items(
+                page_size=page_size,
+                total_segments=total_segments,
+                ProjectionExpression="movie_id, release_year, title, details.director, details.#d",
+                ExpressionAttributeNames={'#d': 'duration'}
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for item in items:
+                    # Nombre de mises à jour en vol borné pour garder une mémoire constante
+                    if len(in_flight) >= max_workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                            count += 1
+                    in_flight.add(executor.submit(bind_operation(self._backfill_item), item))
+                for future in in_flight:
+                    future.result()
+                    count += 1
+            if self.cache is not None:
+                self.cache.clear()
+            logger.info("%s films mis à jour avec les attributs indexés", count, extra=SUCCESS)
+            return count
         except Exception as e:
-            print(f"\033[91mErreur lors de la création de la table avec GSIs: {e}\033[0m")
+            logger.error("Erreur lors du rattrapage des attributs indexés: %s", e)
+            return 0
+
+    def _backfill_item(self, item):
+        attributes = details_index_attributes(item.get('details', {}))
+        if item.get('title'):
+            attributes['title_prefix'] = item['title'][:TITLE_PREFIX_LENGTH]
+        if not attributes:
+            return
+        self.table.update_item(
+            Key={
+                'movie_id': item['movie_id'],
+                'release_year': item['release_year']
+            },
+            UpdateExpression="set " + ", ".join(f"#{name} = :{name}" for name in attributes),
+            ExpressionAttributeNames={f"#{name}": name for name in attributes},
+            ExpressionAttributeValues={f":{name}": value for name, value in attributes.items()}
+        )
+
+    # Scan parallèle : un segment par tâche sur un pool de threads ou de processus,
+    # les pages sont fusionnées en flux dans l'ordre d'arrivée
+    # table : source des scans (par défaut `self.table`, ex. `raw_table()`), uniquement en mode threads
+    def parallel_scan_pages(self, total_segments, max_workers=None, use_processes=False, page_size=None, table=None,
+                            **scan_kwargs):
+        if use_processes and table is not None:
+            raise ValueError("Une table personnalisée ne peut pas être transmise à un pool de processus")
+        scan_kwargs = build_expressions(scan_kwargs)
+        max_workers = max_workers or total_segments
+        manager = multiprocessing.Manager() if use_processes else None
+        if use_processes:
+            pages = manager.Queue(maxsize=max_workers * 2)
+            stop = manager.Event()
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            pages = queue.Queue(maxsize=max_workers * 2)
+            stop = threading.Event()
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            if use_processes:
+                futures = [executor.submit(_scan_segment_process, self._table_name, self._profile_name,
+                                           self._region_name, self._client_settings, segment,
+                                           total_segments, page_size, scan_kwargs, pages, stop)
+                           for segment in range(total_segments)]
+            else:
+                futures = [executor.submit(bind_operation(_scan_segment), table or self.table, segment, total_segments,
+                                           page_size, scan_kwargs, pages, stop)
+                           for segment in range(total_segments)]
+            remaining = total_segments
+            while remaining:
+                try:
+                    page = pages.get(timeout=0.5)
+                except queue.Empty:
+                    # Un worker mort sans marqueur de fin (ex. erreur de sérialisation) ne doit pas bloquer le flux
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()
+                    continue
+                if page is None:
+                    remaining -= 1
+                    continue
+                yield page
+            for future in futures:
+                future.result()  # Propage l'erreur d'un segment éventuel
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+            if manager is not None:
+                manager.shutdown()
+
+    # Écrit un film et ses agrégats dans une même transaction. build(ancienne version ou None) renvoie
+    # (type d'opération, paramètres, nouvelle version ou None), ou None pour ne rien écrire. L'écriture est
+    # conditionnée sur le genre et la note lus : si le film change entre-temps, ou si une autre transaction
+    # modifie le même agrégat, on relit et on recommence. Renvoie (ancienne version, nouvelle version).
+    def _write_with_stats(self, movie_id, release_year, build, max_attempts=8):
+        key = {'movie_id': movie_id, 'release_year': release_year}
+        for attempt in range(max_attempts):
+            old = self.table.get_item(Key=key, ConsistentRead=True).get('Item')
+            operation = build(old)
+            if operation is None:
+                return old, None
+            kind, params, new = operation
+            plain = dict(params, TableName=self._table_name)
+            names = {'#g': 'genre', '#r': 'rating'}
+            values = dict(params.get('ExpressionAttributeValues', {}))
+            if old is None:
+                condition = "attribute_not_exists(movie_id)"
+                names = {}
+            else:
+                conditions = ["attribute_exists(movie_id)"]
+                for name, placeholder in (('genre', '#g'), ('rating', '#r')):
+                    if old.get(name) is None:
+                        conditions.append(f"attribute_not_exists({placeholder})")
+                    else:
+                        conditions.append(f"{placeholder} = :old_{name}")
+                        values[f":old_{name}"] = old[name]
+                condition = " AND ".join(conditions)
+            params = dict(params, TableName=self._table_name, ConditionExpression=condition)
+            if names:
+                params['ExpressionAttributeNames'] = dict(params.get('ExpressionAttributeNames', {}), **names)
+            if values:
+                params['ExpressionAttributeValues'] = values
+            deltas = merge_deltas(movie_deltas(old, -1), movie_deltas(new))
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[{kind: params}] +
+                                  [{'Update': update} for update in stats_updates(STATS_TABLE_NAME, deltas)]
+                )
+                return old, new
+            except self.client.exceptions.ResourceNotFoundException as e:
+                # Table des agrégats supprimée entre-temps : le film est tout de même écrit, sans agrégats
+                logger.warning("Agrégats non tenus à jour (%s), écriture du film seule", e)
+                self._stats_enabled = False
+                write = {'Put': self.client.put_item, 'Update': self.client.update_item,
+                         'Delete': self.client.delete_item}[kind]
+                write(**plain)
+                return old, new
+            except self.client.exceptions.TransactionCanceledException as e:
+                codes = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                if not {'ConditionalCheckFailed', 'TransactionConflict'} & set(codes):
+                    raise
+                logger.debug("Écriture du film %s annulée (%s), nouvel essai", movie_id, codes)
+                time.sleep(backoff_delay(attempt, base=0.01, cap=1.0))
+        raise RuntimeError(f"Écriture du film {movie_id} abandonnée après {max_attempts} essais concurrents")
+
+    # Deltas d'agrégats des écritures `BulkLoader` : fournit le callback on_written (None sans agrégats) et
+    # applique les deltas collectés en sortie de bloc, même si une écriture a échoué : les films déjà écrits
+    # sont toujours comptés
+    @contextmanager
+    def stats_collector(self):
+        if not self._stats_enabled:
+            yield None
+            return
+        deltas = {}
+        lock = threading.Lock()
+
+        def written(old, new):
+            with lock:
+                merge_deltas(deltas, movie_deltas(old, -1))
+                merge_deltas(deltas, movie_deltas(new))
+
+        try:
+            yield written
+        finally:
+            with lock:
+                collected = dict(deltas)
+            self.apply_stats_deltas(collected)
+
+    # Applique des deltas d'agrégats fusionnés (écritures par lots : une mise à jour par agrégat modifié)
+    @_instrumented
+    def apply_stats_deltas(self, deltas):
+        if not self._stats_enabled:
+            return
+        try:
+            for update in stats_updates(STATS_TABLE_NAME, deltas):
+                self.client.update_item(**update)
+        except self.client.exceptions.ResourceNotFoundException as e:
+            logger.warning("Agrégats non tenus à jour: %s", e)
+            self._stats_enabled = False
+
+    # Agrégat reconstitué depuis ses fragments (une lecture groupée), None s'il n'existe pas
+    def _stats_item(self, key, max_retries=8):
+        request = {STATS_TABLE_NAME: {'Keys': [{'stat': stat} for stat in shard_keys(key)]}}
+        items = []
+        attempt = 0
+        while request:
+            response = self.resource.batch_get_item(RequestItems=request)
+            items.extend(response['Responses'].get(STATS_TABLE_NAME, []))
+            request = response.get('UnprocessedKeys')
+            if request:
+                if attempt >= max_retries:
+                    raise RuntimeError(f"Fragments de l'agrégat {key} non lus après {attempt} tentatives")
+                attempt += 1
+                time.sleep(backoff_delay(attempt, base=0.01, cap=1.0))
+        return merge_shards(key, items)
+
+    # Nombre de films et notes moyenne/min/max, au total ou pour un genre ou une année : une seule lecture groupée
+    @_instrumented
+    def get_movie_stats(self, genre=None, release_year=None):
+        if genre is not None and release_year is not None:
+            raise ValueError("Les agrégats sont tenus par genre ou par année, pas par couple genre/année")
+        try:
+            if genre is not None:
+                key = stat_key('genre', genre)
+            elif release_year is not None:
+                key = stat_key('year', release_year)
+            else:
+                key = TOTAL
+            stats = summarize(self._stats_item(key))
+            logger.info("Agrégats %s: %s", key, body(stats), extra=SUCCESS)
+            return stats
+        except Exception as e:
+            logger.error("Erreur lors de la lecture des agrégats: %s", e)
+            return None
+
+    # Tous les agrégats : {'total': ..., 'genres': {genre: ...}, 'years': {année: ...}}
+    @_instrumented
+    def get_all_movie_stats(self):
+        try:
+            stats = {'total': summarize(None), 'genres': {}, 'years': {}}
+            shards = {}
+            for item in self.scan_items(table=self.resource.Table(STATS_TABLE_NAME)):
+                shards.setdefault(unshard_key(item['stat']), []).append(item)
+            for key, items in shards.items():
+                kind, _, value = key.partition('#')
+                if kind == 'genre':
+                    stats['genres'][value] = summarize(merge_shards(key, items))
+                elif kind == 'year':
+                    stats['years'][int(value)] = summarize(merge_shards(key, items))
+                else:
+                    stats['total'] = summarize(merge_shards(key, items))
+            logger.info("Agrégats de %s genres et %s années", len(stats['genres']), len(stats['years']),
+                        extra=SUCCESS)
+            return stats
+        except Exception as e:
+            logger.error("Erreur lors de la lecture des agrégats: %s", e)
+            return None
+
+    # Recalcule tous les agrégats depuis un scan de la table et remplace ceux existants. Les écritures
+    # concurrentes pendant le scan peuvent ne pas être comptées : à lancer quand la table est calme.
+    @_instrumented
+    def rebuild_stats(self, page_size=None, total_segments=None, max_workers=None):
+        try:
+            logger.info("Reconstruction des agrégats de la table %s...", self._table_name)
+            if not self.check_cinema_table_exists(STATS_TABLE_NAME):
+                self.create_stats_table()
+            totals = {TOTAL: {'movie_count': 0}}
+            for item in self.scan_items(page_size=page_size, total_segments=total_segments, max_workers=max_workers,
+                                        ProjectionExpression="release_year, genre, rating"):
+                merge_deltas(totals, movie_deltas(item))
+            stats_table = self.resource.Table(STATS_TABLE_NAME)
+            stale = {item['stat'] for item in self.scan_items(table=stats_table, ProjectionExpression="#s",
+                                                              ExpressionAttributeNames={'#s': 'stat'})}
+            # Chaque agrégat repart d'un seul fragment, les autres sont supprimés
+            stale.difference_update(shard_key(key, 0) for key in totals)
+            with stats_table.batch_writer() as batch:
+                for key, attributes in totals.items():
+                    batch.put_item(Item=stats_item(shard_key(key, 0), attributes))
+                for key in stale:
+                    batch.delete_item(Key={'stat': key})
+            self._stats_enabled = self.maintain_stats
+            stats = summarize(stats_item(TOTAL, totals[TOTAL]))
+            logger.info("Agrégats reconstruits: %s films, %s agrégats", stats['count'], len(totals), extra=SUCCESS)
+            return stats
+        except Exception as e:
+            logger.error("Erreur lors de la reconstruction des agrégats: %s", e)
+            return None
 
     # Exo 3 : Insérer un film dans la table `Movies`
+    @_instrumented
+    @_invalidates_movie
     def insert_movie(self, movie_id, title, release_year, genre, rating, details):
         try:
-            print(f"Insertion du film {title} dans la table {self._table_name}...")
-            self.table.put_item(
-                Item={
-                    'movie_id': movie_id,
-                    'title': title,
-                    'release_year': release_year,
-                    'genre': genre,
-                    'rating': Decimal(str(rating)),  # Utiliser Decimal pour les types flottants
-                    'details': details
-                }
-            )
-            print(f"\033[92mFilm {title} inséré avec succès\033[0m")
+            logger.info("Insertion du film %s dans la table %s...", title, self._table_name)
+            item = movie_to_item({
+                'movie_id': movie_id,
+                'title': title,
+                'release_year': release_year,
+                'genre': genre,
+                'rating': rating,
+                'details': details
+            })
+            if self._stats_enabled:
+                # Un film remplacé retire ses anciennes valeurs des agrégats
+                self._write_with_stats(movie_id, release_year,
+                                       lambda old: ('Put', {'Item': item}, item))
+            else:
+                self.table.put_item(Item=item)
+            logger.info("Film %s inséré avec succès", title, extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de l'insertion du film {title}: {e}\033[0m")
+            logger.error("Erreur lors de l'insertion du film %s: %s", title, e)
 
     # Exo 4 : Insérer plusieurs films en utilisant `batch_writer`
+    @_instrumented
+    @_invalidates_all
     def insert_movies_batch(self, movies):
         try:
-            print(f"Insertion de plusieurs films dans la table {self._table_name}...")
-            with self.table.batch_writer() as batch:
-                for movie in movies:
-                    batch.put_item(
-                        Item={
-                            'movie_id': movie['movie_id'],
-                            'title': movie['title'],
-                            'release_year': movie['release_year'],
-                            'genre': movie['genre'],
-                            'rating': Decimal(str(movie['rating'])),  # Utiliser Decimal pour les types flottants
-                            'details': movie['details']
-                        }
-                    )
-            print("\033[92mTous les films ont été insérés avec succès\033[0m")
-        except Exception as e:
-            print(f"\033[91mErreur lors de l'insertion de plusieurs films: {e}\033[0m")
+            logger.info("Insertion de plusieurs films dans la table %s...", self._table_name)
+            # Un même film ne peut apparaître qu'une fois par lot : la dernière version l'emporte
+            items = list({(item['movie_id'], item['release_year']): item
+                          for item in map(movie_to_item, movies)}.values())
+            if self._stats_enabled:
+                # Chaque PutItem renvoie la version qu'il remplace, même modifiée entre-temps : un film remplacé
+                # n'est pas compté deux fois. Compromis assumé : un appel par film au lieu d'un BatchWriteItem
+                # par lot de 25 (même capacité consommée, voir `insert_movies_batch_without_stats` dans
+                # benchmark.py). Sans agrégats, ou avec maintain_stats=False et rebuild_stats.py, le lot reste
+                # groupé.
+                from bulk_load import BulkLoader
+                with self.stats_collector() as written:
+                    BulkLoader(self.client, self._table_name).write(items, on_written=written)
+            else:
+                with self.table.batch_writer() as batch:
+                    for item in items:
+                        batch.put_item(Item=item)
+            logger.info("Tous les films ont été insérés avec succès", extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de l'insertion de plusieurs films: %s", e)
+
+    # Chargement massif : lots de 25 items répartis sur plusieurs workers avec reprise des `UnprocessedItems`
+    @_instrumented
+    @_invalidates_all
+    def bulk_insert_movies(self, movies, max_workers=8):
+        from bulk_load import BulkLoader
+        try:
+            logger.info("Chargement massif des films dans la table %s avec %s workers...",
+                        self._table_name, max_workers)
+            # Avec les agrégats, un PutItem par film (voir `insert_movies_batch`)
+            with self.stats_collector() as written:
+                stats = BulkLoader(self.client, self._table_name, max_workers=max_workers).load(
+                    movies, on_written=written)
+            logger.info("%s films insérés en %.1fs (%.0f items/s, %.0f WCU consommées)",
+                        stats['items'], stats['seconds'], stats['items_per_second'], stats['consumed_wcu'],
+                        extra=SUCCESS)
+            return stats
+        except Exception as e:
+            logger.error("Erreur lors du chargement massif des films: %s", e)
+            return None
 
     # Exo 5 : Récupérer un film par son `movie_id` et `release_year`
+    @_instrumented
     def get_movie(self, movie_id, release_year):
         try:
-            print(f"Récupération du film avec ID {movie_id} et année de sortie {release_year}...")
-            response = self.table.get_item(
-                Key={
-                    'movie_id': movie_id,
-                    'release_year': release_year
-                }
-            )
-            item = response.get('Item')
+            logger.info("Récupération du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            cache_key = self.cache.movie_key(movie_id, release_year) if self.cache is not None else None
+            item = self.cache.get(cache_key) if cache_key else MISS
+            if item is MISS:
+                generation = self.cache.generation() if cache_key else None
+                response = self.table.get_item(
+                    Key={
+                        'movie_id': movie_id,
+                        'release_year': release_year
+                    }
+                )
+                item = response.get('Item')
+                if cache_key:
+                    self.cache.set(cache_key, item, generation=generation)
             if item:
-                print(f"\033[92mFilm trouvé: {item}\033[0m")
+                logger.info("Film trouvé: %s", body(item), extra=SUCCESS)
             else:
-                print("\033[91mFilm non trouvé\033[0m")
+                logger.error("Film non trouvé")
             return item
         except Exception as e:
-            print(f"\033[91mErreur lors de la récupération du film: {e}\033[0m")
+            logger.error("Erreur lors de la récupération du film: %s", e)
             return None
 
+    # Récupération de plusieurs films en lots BatchGetItem de 100 clés exécutés en parallèle
+    # expression_attribute_names : placeholders de la projection (ex. {'#d': 'duration'}, mot réservé)
+    @_instrumented
+    def get_movies(self, keys, projection_expression=None, max_workers=8, max_retries=8,
+                   expression_attribute_names=None):
+        try:
+            keys = [(movie_id, release_year) for movie_id, release_year in keys]
+            logger.info("Récupération de %s films par lots de %s...", len(keys), BATCH_GET_SIZE)
+            # BatchGetItem refuse les clés en double dans une même requête
+            unique_keys = list(dict.fromkeys(keys))
+            found = {}
+            # Le cache ne contient que des items complets, il est ignoré avec une projection
+            use_cache = self.cache is not None and not projection_expression
+            missing_keys = unique_keys
+            if use_cache:
+                generation = self.cache.generation()
+                missing_keys = []
+                for key in unique_keys:
+                    item = self.cache.get(self.cache.movie_key(*key))
+                    if item is MISS:
+                        missing_keys.append(key)
+                    elif item is not None:
+                        found[key] = item
+            chunks = [missing_keys[i:i + BATCH_GET_SIZE] for i in range(0, len(missing_keys), BATCH_GET_SIZE)]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetch_chunk = bind_operation(
+                    lambda chunk: self._batch_get_chunk(chunk, projection_expression, expression_attribute_names,
+                                                        max_retries))
+                for items in executor.map(fetch_chunk, chunks):
+                    for item in items:
+                        found[(item['movie_id'], item['release_year'])] = item
+            if use_cache:
+                for key in missing_keys:
+                    self.cache.set(self.cache.movie_key(*key), found.get(key), generation=generation)
+            # Résultats dans l'ordre des clés demandées, None pour les films absents
+            movies = [found.get(key) for key in keys]
+            logger.info("%s films trouvés sur %s clés", len(found), len(unique_keys), extra=SUCCESS)
+            return movies
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des films par lots: %s", e)
+            return []
+
+    def _batch_get_chunk(self, chunk, projection_expression, expression_attribute_names, max_retries):
+        request = {'Keys': [{'movie_id': movie_id, 'release_year': release_year} for movie_id, release_year in chunk]}
+        if projection_expression:
+            # Les attributs de clé sont nécessaires pour remettre les résultats dans l'ordre ; ils ne sont ajoutés
+            # que s'ils manquent, un chemin projeté deux fois étant refusé
+            names = expression_attribute_names or {}
+            paths = {names.get(path.strip(), path.strip()) for path in projection_expression.split(',')}
+            missing = [key for key in ('movie_id', 'release_year') if key not in paths]
+            request['ProjectionExpression'] = ", ".join(missing + [projection_expression])
+            if names:
+                request['ExpressionAttributeNames'] = names
+        request_items = {self._table_name: request}
+        items = []
+        attempt = 0
+        while request_items:
+            response = self.client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get('Responses', {}).get(self._table_name, []))
+            request_items = response.get('UnprocessedKeys') or {}
+            if request_items:
+                if attempt >= max_retries:
+                    raise RuntimeError(f"Clés non traitées après {attempt} tentatives")
+                attempt += 1
+                # Backoff exponentiel avec jitter avant de relancer les `UnprocessedKeys`
+                time.sleep(backoff_delay(attempt))
+        return items
+
+    # Une page d'une requête GSI de `INDEX_QUERIES`, servie par le cache quand il est activé
+    # (clé = opération + arguments normalisés + taille de page + curseur)
+    def _query_index(self, operation, args, page_size=None, cursor=None):
+        cache_key = self.cache.query_key(operation, *args, page_size, cursor) if self.cache is not None else None
+        page = self.cache.get(cache_key) if cache_key else MISS
+        if page is MISS:
+            query_kwargs = INDEX_QUERIES[operation](*args)
+            if page_size:
+                query_kwargs['Limit'] = page_size
+            if cursor:
+                query_kwargs['ExclusiveStartKey'] = decode_cursor(operation, args, cursor)
+            response = self.table.query(**build_expressions(query_kwargs))
+            page = ResultPage(response.get('Items', []),
+                              encode_cursor(operation, args, response.get('LastEvaluatedKey')))
+            if cache_key:
+                self.cache.set(cache_key, page)
+        return page
+
+    # Itérateur de pages d'une requête GSI paginable (ex. `iter_index_pages('query_movies_by_genre', 'Sci-Fi')`) :
+    # la page suivante est chargée pendant le traitement de la courante, la mémoire reste constante
+    def iter_index_pages(self, operation, *args, page_size=None, cursor=None):
+        if operation not in INDEX_QUERIES:
+            raise ValueError(f"Requête non paginable: {operation}")
+        yield from prefetch_pages(lambda next_cursor: self._query_index(operation, args, page_size, next_cursor),
+                                  cursor)
+
     # Exo 6 : Rechercher des films par `genre` en utilisant le GSI
-    def query_movies_by_genre(self, genre):
+    @_instrumented
+    def query_movies_by_genre(self, genre, page_size=None, cursor=None):
         try:
-            print(f"Recherche des films du genre {genre}...")
-            response = self.table.query(
-                IndexName='GenreIndex',
-                KeyConditionExpression=Key('genre').eq(genre)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films du genre %s...", genre)
+            items = self._query_index('query_movies_by_genre', (genre,), page_size, cursor)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films par genre {genre}: {e}\033[0m")
-            return []
+            logger.error("Erreur lors de la recherche des films par genre %s: %s", genre, e)
+            return ResultPage()
 
     # Exo 7 : Rechercher des films sortis après 2000
-    def query_movies_by_release_year(self, year):
+    @_instrumented
+    def query_movies_by_release_year(self, year, page_size=None, limit=None, total_segments=None):
         try:
-            print(f"Recherche des films sortis après l'année {year}...")
-            response = self.table.scan(
+            logger.info("Recherche des films sortis après l'année %s...", year)
+            items = list(self.scan_items(
+                page_size=page_size,
+                limit=limit,
+                total_segments=total_segments,
                 FilterExpression=Attr('release_year').gt(year)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            ))
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films sortis après {year}: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films sortis après %s: %s", year, e)
             return []
 
     # Exo 8 : Rechercher des films avec une note supérieure à 8.5
-    def query_movies_by_rating(self, rating):
+    @_instrumented
+    def query_movies_by_rating(self, rating, page_size=None, limit=None, total_segments=None):
         try:
-            print(f"Recherche des films avec une note supérieure à {rating}...")
-            response = self.table.scan(
+            logger.info("Recherche des films avec une note supérieure à %s...", rating)
+            items = list(self.scan_items(
+                page_size=page_size,
+                limit=limit,
+                total_segments=total_segments,
                 FilterExpression=Attr('rating').gt(Decimal(str(rating)))
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            ))
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films avec une note supérieure à {rating}: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films avec une note supérieure à %s: %s", rating, e)
             return []
 
     # Exo 9 : Mettre à jour la note d'un film
+    @_instrumented
+    @_invalidates_movie
     def update_movie_rating(self, movie_id, release_year, new_rating):
         try:
-            print(f"Mise à jour de la note du film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Mise à jour de la note du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            if self._stats_enabled:
+                def build(old):
+                    if old is None:
+                        return None
+                    return ('Update', {
+                        'Key': {'movie_id': movie_id, 'release_year': release_year},
+                        'UpdateExpression': "SET rating = :r",
+                        'ExpressionAttributeValues': {':r': Decimal(str(new_rating))}
+                    }, dict(old, rating=Decimal(str(new_rating))))
+                old, new = self._write_with_stats(movie_id, release_year, build)
+                if new is None:
+                    logger.error("Film non trouvé, note non mise à jour")
+                else:
+                    logger.info("Note du film mise à jour avec succès: %s", body({'rating': new['rating']}),
+                                extra=SUCCESS)
+                return
             response = self.table.update_item(
                 Key={
                     'movie_id': movie_id,
@@ -247,14 +1231,26 @@ class DynamoDB:
                 },
                 ReturnValues="UPDATED_NEW"
             )
-            print(f"\033[92mNote du film mise à jour avec succès: {response['Attributes']}\033[0m")
+            logger.info("Note du film mise à jour avec succès: %s", body(response['Attributes']), extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la mise à jour de la note du film: {e}\033[0m")
+            logger.error("Erreur lors de la mise à jour de la note du film: %s", e)
 
     # Exo 10 : Supprimer un film de la table
+    @_instrumented
+    @_invalidates_movie
     def delete_movie(self, movie_id, release_year):
         try:
-            print(f"Suppression du film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Suppression du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            if self._stats_enabled:
+                old, _ = self._write_with_stats(
+                    movie_id, release_year,
+                    lambda old: ('Delete', {'Key': {'movie_id': movie_id, 'release_year': release_year}}, None)
+                    if old is not None else None)
+                if old is not None:
+                    logger.info("Film supprimé avec succès: %s", body(old), extra=SUCCESS)
+                else:
+                    logger.error("Film non trouvé, rien à supprimer")
+                return
             response = self.table.delete_item(
                 Key={
                     'movie_id': movie_id,
@@ -263,16 +1259,19 @@ class DynamoDB:
                 ReturnValues="ALL_OLD"
             )
             if 'Attributes' in response:
-                print(f"\033[92mFilm supprimé avec succès: {response['Attributes']}\033[0m")
+                logger.info("Film supprimé avec succès: %s", body(response['Attributes']), extra=SUCCESS)
             else:
-                print("\033[91mFilm non trouvé, rien à supprimer\033[0m")
+                logger.error("Film non trouvé, rien à supprimer")
         except Exception as e:
-            print(f"\033[91mErreur lors de la suppression du film: {e}\033[0m")
+            logger.error("Erreur lors de la suppression du film: %s", e)
 
     # Exo 11 : Ajouter un attribut JSON à un film
+    @_instrumented
+    @_invalidates_movie
     def add_movie_awards(self, movie_id, release_year, awards):
         try:
-            print(f"Ajout de l'attribut 'awards' au film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Ajout de l'attribut 'awards' au film avec ID %s et année de sortie %s...",
+                        movie_id, release_year)
             response = self.table.update_item(
                 Key={
                     'movie_id': movie_id,
@@ -284,127 +1283,220 @@ class DynamoDB:
                 },
                 ReturnValues="UPDATED_NEW"
             )
-            print(f"\033[92mAwards ajoutés avec succès: {response['Attributes']}\033[0m")
+            logger.info("Awards ajoutés avec succès: %s", body(response['Attributes']), extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de l'ajout des awards au film: {e}\033[0m")
+            logger.error("Erreur lors de l'ajout des awards au film: %s", e)
 
     # Exo 12 : Rechercher des films avec une durée supérieure à 150 minutes
-    def query_movies_by_duration(self, min_duration):
+    @_instrumented
+    def query_movies_by_duration(self, min_duration, page_size=None, limit=None):
         try:
-            print(f"Recherche des films avec une durée supérieure à {min_duration} minutes...")
-            response = self.table.scan(
-                FilterExpression=Attr('details.duration').gt(min_duration)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films avec une durée supérieure à %s minutes...", min_duration)
+            items = self._query_duration_buckets(Key('duration').gt(min_duration), min_duration, None,
+                                                 page_size, limit)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films par durée: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films par durée: %s", e)
             return []
 
     # Exo 13 : Compter le nombre total de films dans la table
-    def count_total_movies(self):
+    # Lecture du compteur matérialisé quand les agrégats sont tenus à jour, scan complet sinon (compteur ou table
+    # des agrégats absents, ou from_scan)
+    @_instrumented
+    def count_total_movies(self, page_size=None, total_segments=None, from_scan=False):
         try:
-            print("Comptage du nombre total de films dans la table...")
-            response = self.table.scan(
+            logger.info("Comptage du nombre total de films dans la table...")
+            if self._stats_enabled and not from_scan:
+                try:
+                    item = self._stats_item(TOTAL)
+                except self.client.exceptions.ResourceNotFoundException:
+                    item = None
+                if item is not None:
+                    count = int(item.get('movie_count', 0))
+                    logger.info("Nombre total de films dans la table: %s", count, extra=SUCCESS)
+                    return count
+            # Réduction des comptes de chaque page (et de chaque segment en mode parallèle)
+            count = sum(page['Count'] for page in self.scan_pages(
+                page_size=page_size,
+                total_segments=total_segments,
                 Select='COUNT'
-            )
-            count = response['Count']
-            print(f"\033[92mNombre total de films dans la table: {count}\033[0m")
+            ))
+            logger.info("Nombre total de films dans la table: %s", count, extra=SUCCESS)
             return count
         except Exception as e:
-            print(f"\033[91mErreur lors du comptage des films: {e}\033[0m")
+            logger.error("Erreur lors du comptage des films: %s", e)
             return 0
 
     # Exo 14 : Rechercher des films par genre et année de sortie en utilisant une clé composite
-    def query_movies_by_genre_and_year(self, genre, min_year):
+    @_instrumented
+    def query_movies_by_genre_and_year(self, genre, min_year, page_size=None, cursor=None):
         try:
-            print(f"Recherche des films du genre {genre} sortis après l'année {min_year}...")
-            response = self.table.query(
-                IndexName='GenreIndex',
-                KeyConditionExpression=Key('genre').eq(genre) & Key('release_year').gt(min_year)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films du genre %s sortis après l'année %s...", genre, min_year)
+            items = self._query_index('query_movies_by_genre_and_year', (genre, min_year), page_size, cursor)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films par genre et année: {e}\033[0m")
-            return []
+            logger.error("Erreur lors de la recherche des films par genre et année: %s", e)
+            return ResultPage()
 
     # Exo 15 : Rechercher des films dont le titre commence par 'I'
-    def query_movies_by_title_starting_with(self, prefix):
+    @_instrumented
+    def query_movies_by_title_starting_with(self, prefix, page_size=None, limit=None, total_segments=None):
         try:
-            print(f"Recherche des films dont le titre commence par '{prefix}'...")
-            response = self.table.scan(
-                FilterExpression=Attr('title').begins_with(prefix)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films dont le titre commence par '%s'...", prefix)
+            if len(prefix) >= TITLE_PREFIX_LENGTH:
+                items = list(self.query_items(
+                    page_size=page_size,
+                    limit=limit,
+                    IndexName='TitlePrefixIndex',
+                    KeyConditionExpression=Key('title_prefix').eq(prefix[:TITLE_PREFIX_LENGTH]) & Key(
+                        'title').begins_with(prefix)
+                ))
+            else:
+                # Préfixe plus court que la partition de TitlePrefixIndex : retour au scan
+                items = list(self.scan_items(
+                    page_size=page_size,
+                    limit=limit,
+                    total_segments=total_segments,
+                    FilterExpression=Attr('title').begins_with(prefix)
+                ))
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films par titre: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films par titre: %s", e)
 
     # Exo 17 : Rechercher des films par `release_year` en utilisant le nouveau GSI
-    def query_movies_by_release_year_gsi(self, release_year):
+    @_instrumented
+    def query_movies_by_release_year_gsi(self, release_year, page_size=None, cursor=None):
         try:
-            print(f"Recherche des films sortis en {release_year} en utilisant le GSI...")
-            response = self.table.query(
-                IndexName='ReleaseYearRatingIndex',
-                KeyConditionExpression=Key('release_year').eq(release_year)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films sortis en %s en utilisant le GSI...", release_year)
+            items = self._query_index('query_movies_by_release_year_gsi', (release_year,), page_size, cursor)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(
-                f"\033[91mErreur lors de la recherche des films sortis en {release_year} en utilisant le GSI: {e}\033[0m")
-            return []
+            logger.error("Erreur lors de la recherche des films sortis en %s en utilisant le GSI: %s", release_year, e)
+            return ResultPage()
 
     # Exo 18 : Rechercher des films avec une note supérieure à 8.5 en utilisant le nouveau GSI
-    def query_movies_by_rating_gsi(self, release_year, rating):
+    @_instrumented
+    def query_movies_by_rating_gsi(self, release_year, rating, page_size=None, cursor=None):
         try:
-            print(
-                f"Recherche des films avec une note supérieure à {rating} en utilisant le GSI pour l'année {release_year}...")
-            response = self.table.query(
-                IndexName='ReleaseYearRatingIndex',
-                KeyConditionExpression=Key('release_year').eq(release_year) & Key('rating').gt(Decimal(str(rating)))
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films avec une note supérieure à %s en utilisant le GSI pour l'année %s...",
+                        rating, release_year)
+            items = self._query_index('query_movies_by_rating_gsi', (release_year, rating), page_size, cursor)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(
-                f"\033[91mErreur lors de la recherche des films avec une note supérieure à {rating} en utilisant le GSI: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films avec une note supérieure à %s en utilisant le GSI: %s",
+                         rating, e)
+            return ResultPage()
+
+    # Meilleurs films d'une plage d'années : une requête ReleaseYearRatingIndex par année, par note décroissante,
+    # fusionnées par un tas. Les premiers résultats sont produits dès la première page de chaque année et une année
+    # n'est lue que tant qu'elle peut encore fournir un film du top k : au plus k films lus par année.
+    def iter_top_rated_movies(self, min_year, max_year, k=10, rating=None, page_size=None, max_workers=8):
+        years = list(range(min_year, max_year + 1))
+        if k <= 0 or not years:
+            return
+        page_size = min(page_size or k, k)
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(years)))
+        fetch = bind_operation(self._top_rated_page)
+        try:
+            # Année -> [items de la page courante, position dans la page, page suivante en cours, films lus]
+            streams = {}
+            for year in years:
+                streams[year] = [[], 0, executor.submit(fetch, year, rating, page_size, None), 0]
+            heap = []
+            for year in years:
+                self._advance_top_rated(executor, fetch, streams, heap, year, rating, page_size, k)
+            produced = 0
+            while heap and produced < k:
+                _, year, _, item = heapq.heappop(heap)
+                yield item
+                produced += 1
+                self._advance_top_rated(executor, fetch, streams, heap, year, rating, page_size, k)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _top_rated_page(self, year, rating, limit, start_key):
+        key_condition = Key('release_year').eq(year)
+        if rating is not None:
+            key_condition &= Key('rating').gt(Decimal(str(rating)))
+        query_kwargs = {
+            'IndexName': 'ReleaseYearRatingIndex',
+            'KeyConditionExpression': key_condition,
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        response = self.table.query(**build_expressions(query_kwargs))
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+    # Place dans le tas le prochain film de l'année, en attendant sa page si besoin et en préchargeant la suivante
+    def _advance_top_rated(self, executor, fetch, streams, heap, year, rating, page_size, k):
+        stream = streams[year]
+        if stream[1] >= len(stream[0]):
+            if stream[2] is None:
+                return
+            items, last_key = stream[2].result()
+            stream[3] += len(items)
+            stream[0], stream[1] = items, 0
+            stream[2] = None
+            if last_key and stream[3] < k:
+                stream[2] = executor.submit(fetch, year, rating, min(page_size, k - stream[3]), last_key)
+            if not items:
+                # Page vide (filtrage côté serveur) : on passe directement à la suivante
+                self._advance_top_rated(executor, fetch, streams, heap, year, rating, page_size, k)
+                return
+        item = stream[0][stream[1]]
+        heapq.heappush(heap, (-item['rating'], year, stream[1] + stream[3], item))
+        stream[1] += 1
+
+    @_instrumented
+    def query_top_rated_movies(self, min_year, max_year, k=10, rating=None, page_size=None, max_workers=8):
+        try:
+            logger.info("Recherche des %s meilleurs films sortis entre %s et %s...", k, min_year, max_year)
+            items = list(self.iter_top_rated_movies(min_year, max_year, k, rating, page_size, max_workers))
+            log_items(logger, items)
+            return items
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des meilleurs films entre %s et %s: %s", min_year, max_year, e)
             return []
 
     # Exo 19 : Mettre à jour les détails d'un film
+    @_instrumented
+    @_invalidates_movie
     def update_movie_details(self, movie_id, release_year, new_details):
         try:
-            print(f"Mise à jour des détails du film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Mise à jour des détails du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            # Les attributs projetés pour les GSIs sont mis à jour dans la même requête
+            set_clauses, remove_clauses, names, values = details_index_update(new_details)
+            update_expression = "set " + ", ".join(["details = :d"] + set_clauses)
+            if remove_clauses:
+                update_expression += " remove " + ", ".join(remove_clauses)
             response = self.table.update_item(
                 Key={
                     'movie_id': movie_id,
                     'release_year': release_year
                 },
-                UpdateExpression="set details = :d",
-                ExpressionAttributeValues={
-                    ':d': new_details
-                },
+                UpdateExpression=update_expression,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=dict(values, **{':d': new_details}),
                 ReturnValues="UPDATED_NEW"
             )
-            print(f"\033[92mDétails du film mis à jour avec succès: {response['Attributes']}\033[0m")
+            logger.info("Détails du film mis à jour avec succès: %s", body(response['Attributes']), extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la mise à jour des détails du film: {e}\033[0m")
+            logger.error("Erreur lors de la mise à jour des détails du film: %s", e)
 
     # Exo 19.1 : Mettre à jour le champ `sequels` d'un film en augmentant sa valeur de 1
+    @_instrumented
+    @_invalidates_movie
     def increment_movie_sequels(self, movie_id, release_year):
         try:
-            print(f"Mise à jour du champ 'sequels' du film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Mise à jour du champ 'sequels' du film avec ID %s et année de sortie %s...",
+                        movie_id, release_year)
             response = self.table.update_item(
                 Key={
                     'movie_id': movie_id,
@@ -416,177 +1508,538 @@ class DynamoDB:
                 },
                 ReturnValues="UPDATED_NEW"
             )
-            print(f"\033[92mChamp 'sequels' du film mis à jour avec succès: {response['Attributes']}\033[0m")
+            logger.info("Champ 'sequels' du film mis à jour avec succès: %s",
+                        body(response['Attributes']), extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la mise à jour du champ 'sequels' du film: {e}\033[0m")
+            logger.error("Erreur lors de la mise à jour du champ 'sequels' du film: %s", e)
 
     # Exo 20 : Supprimer tous les films d'un genre spécifique
-    def delete_movies_by_genre(self, genre):
+    @_instrumented
+    def delete_movies_by_genre(self, genre, dry_run=False, max_workers=8, progress=None):
+        return self.delete_movies(genre=genre, dry_run=dry_run, max_workers=max_workers, progress=progress)
+
+    @_instrumented
+    def delete_movies_by_release_year(self, release_year, dry_run=False, max_workers=8, progress=None):
+        return self.delete_movies(release_year=release_year, dry_run=dry_run, max_workers=max_workers,
+                                  progress=progress)
+
+    # Films d'un genre et/ou d'une année (clé et attributs des agrégats), toutes pages comprises
+    def _movies_to_delete(self, genre, release_year, page_size):
+        if genre is not None:
+            key_condition = Key('genre').eq(genre)
+            if release_year is not None:
+                key_condition &= Key('release_year').eq(release_year)
+            index_name = 'GenreIndex'
+        else:
+            key_condition = Key('release_year').eq(release_year)
+            index_name = 'ReleaseYearRatingIndex'
+        for item in self.query_items(
+                page_size=page_size,
+                IndexName=index_name,
+                KeyConditionExpression=key_condition,
+                ProjectionExpression="movie_id, release_year, genre, rating"
+        ):
+            yield item
+
+    # Suppression en masse : les clés sont lues en flux et supprimées par lots de 25 répartis sur plusieurs workers,
+    # avec reprise des `UnprocessedItems`. Les GSIs étant à lecture éventuellement cohérente, de nouvelles passes
+    # sont faites jusqu'à ce qu'aucun film ne corresponde (au plus `max_passes`).
+    # progress(nombre de films supprimés) est appelé au fil des lots ; dry_run compte sans rien supprimer.
+    @_instrumented
+    @_invalidates_all
+    def delete_movies(self, genre=None, release_year=None, dry_run=False, max_workers=8, progress=None,
+                      page_size=None, max_passes=3):
+        from bulk_load import BulkLoader
+        if genre is None and release_year is None:
+            raise ValueError("Un genre ou une année de sortie est requis")
         try:
-            print(f"Suppression de tous les films du genre {genre}...")
-            response = self.table.query(
-                IndexName='GenreIndex',
-                KeyConditionExpression=Key('genre').eq(genre)
-            )
-            items = response.get('Items', [])
-            with self.table.batch_writer() as batch:
-                for item in items:
-                    batch.delete_item(
-                        Key={
-                            'movie_id': item['movie_id'],
-                            'release_year': item['release_year']
-                        }
-                    )
-            print(f"\033[92mTous les films du genre {genre} ont été supprimés avec succès\033[0m")
+            logger.info("Suppression des films (genre %s, année %s)%s...", genre, release_year,
+                        " [simulation]" if dry_run else "")
+            if dry_run:
+                matched = sum(1 for _ in self._movies_to_delete(genre, release_year, page_size))
+                logger.info("%s films seraient supprimés", matched, extra=SUCCESS)
+                return {'matched': matched, 'deleted': 0, 'dry_run': True}
+
+            loader = BulkLoader(self.client, self._table_name, max_workers=max_workers)
+
+            logged = [0]
+
+            def report(deleted):
+                # Une ligne de log tous les `DELETE_PROGRESS_EVERY` films, le callback à chaque lot
+                if deleted - logged[0] >= DELETE_PROGRESS_EVERY:
+                    logged[0] = deleted
+                    logger.info("%s films supprimés...", deleted)
+                if progress is not None:
+                    progress(deleted)
+
+            start = time.perf_counter()
+            deleted = set()
+
+            # Un film déjà supprimé peut réapparaître dans l'index à la passe suivante : il n'est envoyé qu'une fois
+            def keys():
+                for item in self._movies_to_delete(genre, release_year, page_size):
+                    key = (item['movie_id'], item['release_year'])
+                    if key in deleted:
+                        continue
+                    deleted.add(key)
+                    yield {'movie_id': item['movie_id'], 'release_year': item['release_year']}
+
+            # Avec les agrégats, chaque film est supprimé seul (ReturnValues=ALL_OLD) : les valeurs retirées sont
+            # celles de la table de base au moment de la suppression, pas celles lues dans l'index. Les deltas sont
+            # appliqués après chaque passe, même interrompue ; un arrêt du processus entre-temps laisse un écart,
+            # corrigé par rebuild_stats.py.
+            passes = 0
+            stats = None
+            while passes < max_passes:
+                passes += 1
+                before = loader.items_written
+                with self.stats_collector() as removed:
+                    stats = loader.delete(keys(), report, removed)
+                if loader.items_written == before:
+                    break
+            else:
+                # Dernière vérification : des films peuvent encore apparaître dans l'index
+                remaining = sum(1 for _ in self._movies_to_delete(genre, release_year, page_size))
+                if remaining:
+                    logger.warning("%s films restent visibles dans l'index après %s passes", remaining, passes)
+            seconds = time.perf_counter() - start
+            stats = dict(stats, matched=loader.items_written, deleted=loader.items_written, passes=passes,
+                         seconds=seconds, items_per_second=loader.items_written / seconds if seconds else 0.0,
+                         dry_run=False)
+            logger.info("%s films du genre %s / année %s supprimés en %.1fs", stats['deleted'], genre, release_year,
+                        stats['seconds'], extra=SUCCESS)
+            return stats
         except Exception as e:
-            print(f"\033[91mErreur lors de la suppression des films du genre {genre}: {e}\033[0m")
+            logger.error("Erreur lors de la suppression des films (genre %s, année %s): %s", genre, release_year, e)
+            return None
 
     # Exo 21 : Rechercher des films dont le réalisateur est "Christopher Nolan"
-    def query_movies_by_director(self, director):
+    @_instrumented
+    def query_movies_by_director(self, director, page_size=None, limit=None):
         try:
-            print(f"Recherche des films réalisés par {director}...")
-            response = self.table.scan(
-                FilterExpression=Attr('details.director').eq(director)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films réalisés par %s...", director)
+            items = list(self.query_items(
+                page_size=page_size,
+                limit=limit,
+                IndexName='DirectorIndex',
+                KeyConditionExpression=Key('director').eq(director)
+            ))
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films réalisés par {director}: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films réalisés par %s: %s", director, e)
             return []
 
     # Exo 22 : Rechercher des films avec une durée comprise entre 120 et 180 minutes
-    def query_movies_by_duration_range(self, min_duration, max_duration):
+    @_instrumented
+    def query_movies_by_duration_range(self, min_duration, max_duration, page_size=None, limit=None):
         try:
-            print(f"Recherche des films avec une durée comprise entre {min_duration} et {max_duration} minutes...")
-            response = self.table.scan(
-                FilterExpression=Attr('details.duration').between(min_duration, max_duration)
-            )
-            items = response.get('Items', [])
-            for item in items:
-                print(item)
+            logger.info("Recherche des films avec une durée comprise entre %s et %s minutes...",
+                        min_duration, max_duration)
+            items = self._query_duration_buckets(Key('duration').between(min_duration, max_duration),
+                                                 min_duration, max_duration, page_size, limit)
+            log_items(logger, items)
             return items
         except Exception as e:
-            print(
-                f"\033[91mErreur lors de la recherche des films avec une durée comprise entre {min_duration} et {max_duration} minutes: {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films avec une durée comprise entre %s et %s minutes: %s",
+                         min_duration, max_duration, e)
             return []
 
     # Exo 23 : Ajouter des critiques dans le sous-objet `details` d'un film
+    @_instrumented
+    @_invalidates_movie
     def add_movie_reviews(self, movie_id, release_year, reviews):
         try:
-            print(f"Ajout des critiques au film avec ID {movie_id} et année de sortie {release_year}...")
+            logger.info("Ajout des critiques au film avec ID %s et année de sortie %s...", movie_id, release_year)
+            attributes = self._append_reviews(movie_id, release_year, reviews)
+            self.index_reviews(movie_id, release_year, reviews)
+            logger.info("Critiques ajoutées avec succès: %s", body(attributes), extra=SUCCESS)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            logger.error("Film non trouvé, aucune critique ajoutée")
+        except Exception as e:
+            logger.error("Erreur lors de l'ajout des critiques au film: %s", e)
 
-            # Récupérer les critiques actuelles
-            response = self.table.get_item(
+    # Exo 23.1 : Ajouter une critique une par une dans le sous-objet `details` d'un film en utilisant list_append
+    @_instrumented
+    @_invalidates_movie
+    def add_single_review(self, movie_id, release_year, review):
+        try:
+            logger.info("Ajout de la critique au film avec ID %s et année de sortie %s...", movie_id, release_year)
+            attributes = self._append_reviews(movie_id, release_year, [review])
+            self.index_reviews(movie_id, release_year, [review])
+            logger.info("Critique ajoutée avec succès: %s", body(attributes), extra=SUCCESS)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            logger.error("Film non trouvé, aucune critique ajoutée")
+        except Exception as e:
+            logger.error("Erreur lors de l'ajout de la critique au film: %s", e)
+
+    # Ajout atomique en un seul aller-retour : `if_not_exists` crée la liste au premier ajout et `list_append`
+    # ne réécrit jamais les critiques d'un écrivain concurrent. Le film doit exister. Privé : les appelants publics
+    # (`add_movie_reviews`, `add_single_review`) invalident le cache et indexent les critiques.
+    def _append_reviews(self, movie_id, release_year, reviews):
+        update_expression = "SET details.reviews = list_append(if_not_exists(details.reviews, :empty), :r)"
+        values = {':empty': [], ':r': reviews}
+        return_values = "UPDATED_NEW"
+        if self.max_inline_reviews is not None:
+            # L'item borné reste petit : on relit le compteur de débordement, même inchangé
+            update_expression += ", reviews_spilled = if_not_exists(reviews_spilled, :zero)"
+            values[':zero'] = 0
+            return_values = "ALL_NEW"
+        response = self.table.update_item(
+            Key={
+                'movie_id': movie_id,
+                'release_year': release_year
+            },
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_exists(movie_id)",
+            ExpressionAttributeValues=values,
+            ReturnValues=return_values
+        )
+        attributes = response['Attributes']
+        if self.max_inline_reviews is not None:
+            self._spill_reviews(movie_id, release_year, attributes['details']['reviews'],
+                                attributes['reviews_spilled'])
+        return attributes
+
+    # Mode borné : déplace les critiques les plus anciennes dans un bloc de débordement, numéroté par la position
+    # globale de sa première critique. Le bloc ne peut que grandir et la liste n'est raccourcie que si elle n'a
+    # pas changé depuis l'ajout : un écrivain concurrent ne peut donc pas perdre de critique.
+    def _spill_reviews(self, movie_id, release_year, inline_reviews, spilled):
+        excess = len(inline_reviews) - self.max_inline_reviews
+        if excess <= 0:
+            return
+        try:
+            self.resource.Table(REVIEW_OVERFLOW_TABLE_NAME).put_item(
+                Item={
+                    'movie_key': f"{movie_id}#{release_year}",
+                    'position': spilled,
+                    'reviews': inline_reviews[:excess]
+                },
+                ConditionExpression="attribute_not_exists(movie_key) OR size(reviews) < :count",
+                ExpressionAttributeValues={':count': excess}
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            pass  # Un bloc au moins aussi long existe déjà à cette position
+        try:
+            self.table.update_item(
                 Key={
                     'movie_id': movie_id,
                     'release_year': release_year
                 },
-                ProjectionExpression="details.reviews"
+                UpdateExpression="REMOVE " + ", ".join(f"details.reviews[{i}]" for i in range(excess)) +
+                                 " ADD reviews_spilled :excess",
+                ConditionExpression="size(details.reviews) = :size AND reviews_spilled = :spilled",
+                ExpressionAttributeValues={':excess': excess, ':size': len(inline_reviews), ':spilled': spilled}
             )
-            current_reviews = response.get('Item', {}).get('details', {}).get('reviews', [])
-
-            # Vérifier si current_reviews est une liste, sinon initialiser comme liste
-            if not isinstance(current_reviews, list):
-                current_reviews = []
+        except self.client.exceptions.ConditionalCheckFailedException:
+            # La liste a changé entre-temps : le prochain ajout refera le déplacement
+            logger.debug("Déplacement des critiques du film %s reporté", movie_id)
+
+    # Toutes les critiques d'un film dans l'ordre d'ajout, débordement compris
+    @_instrumented
+    def get_movie_reviews(self, movie_id, release_year):
+        item = self.table.get_item(
+            Key={
+                'movie_id': movie_id,
+                'release_year': release_year
+            },
+            ProjectionExpression="details.reviews, reviews_spilled"
+        ).get('Item')
+        if item is None:
+            return []
+        spilled = int(item.get('reviews_spilled', 0))
+        by_position = {}
+        if spilled:
+            # Les blocs peuvent se chevaucher ou dépasser `reviews_spilled` après un déplacement reporté
+            for chunk in self.query_items(table=self.resource.Table(REVIEW_OVERFLOW_TABLE_NAME),
+                                          KeyConditionExpression=Key('movie_key').eq(f"{movie_id}#{release_year}")):
+                for offset, review in enumerate(chunk['reviews']):
+                    position = int(chunk['position']) + offset
+                    if position < spilled:
+                        by_position[position] = review
+        return [by_position[position] for position in sorted(by_position)] + \
+            item.get('details', {}).get('reviews', [])
 
-            # Ajouter les nouvelles critiques
-            current_reviews.extend(reviews)
+    # Exo 24 : Rechercher des films dont une critique contient le mot "Amazing"
+    @_instrumented
+    def query_movies_with_amazing_reviews(self):
+        return self.search_reviews('Amazing')
 
-            # Mettre à jour les critiques
-            response = self.table.update_item(
-                Key={
-                    'movie_id': movie_id,
-                    'release_year': release_year
-                },
-                UpdateExpression="set details.reviews = :r",
-                ExpressionAttributeValues={
-                    ':r': current_reviews
-                },
-                ReturnValues="UPDATED_NEW"
+    def create_review_index_table(self):
+        try:
+            logger.info("Début de la création de la table '%s'...", REVIEW_INDEX_TABLE_NAME)
+            self.resource.create_table(
+                TableName=REVIEW_INDEX_TABLE_NAME,
+                KeySchema=[
+                    {
+                        'AttributeName': 'term',
+                        'KeyType': 'HASH'  # Clé de partition
+                    },
+                    {
+                        'AttributeName': 'movie_key',
+                        'KeyType': 'RANGE'  # Clé de tri : "movie_id#release_year"
+                    }
+                ],
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'term',
+                        'AttributeType': 'S'
+                    },
+                    {
+                        'AttributeName': 'movie_key',
+                        'AttributeType': 'S'
+                    }
+                ],
+                ProvisionedThroughput={
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
             )
-            print(f"\033[92mCritiques ajoutées avec succès: {response['Attributes']}\033[0m")
+            self.client.get_waiter('table_exists').wait(TableName=REVIEW_INDEX_TABLE_NAME)
+            logger.info("Table '%s' créée avec succès", REVIEW_INDEX_TABLE_NAME, extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de l'ajout des critiques au film: {e}\033[0m")
+            logger.error("Erreur lors de la création de la table '%s': %s", REVIEW_INDEX_TABLE_NAME, e)
 
-    # Exo 23.1 : Ajouter une critique une par une dans le sous-objet `details` d'un film en utilisant list_append
-    def add_single_review(self, movie_id, release_year, review):
+    def create_review_overflow_table(self):
         try:
-            print(f"Ajout de la critique au film avec ID {movie_id} et année de sortie {release_year}...")
-
-            # Mettre à jour les critiques en utilisant list_append
-            response = self.table.update_item(
-                Key={
-                    'movie_id': movie_id,
-                    'release_year': release_year
-                },
-                UpdateExpression="SET details.reviews = list_append(details.reviews, :r)",
-                ExpressionAttributeValues={
-                    ':r': [review]
-                },
-                ReturnValues="UPDATED_NEW"
+            logger.info("Début de la création de la table '%s'...", REVIEW_OVERFLOW_TABLE_NAME)
+            self.resource.create_table(
+                TableName=REVIEW_OVERFLOW_TABLE_NAME,
+                KeySchema=[
+                    {
+                        'AttributeName': 'movie_key',
+                        'KeyType': 'HASH'  # Clé de partition : "movie_id#release_year"
+                    },
+                    {
+                        'AttributeName': 'position',
+                        'KeyType': 'RANGE'  # Clé de tri : position de la première critique du bloc
+                    }
+                ],
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'movie_key',
+                        'AttributeType': 'S'
+                    },
+                    {
+                        'AttributeName': 'position',
+                        'AttributeType': 'N'
+                    }
+                ],
+                ProvisionedThroughput={
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
             )
-            print(f"\033[92mCritique ajoutée avec succès: {response['Attributes']}\033[0m")
+            self.client.get_waiter('table_exists').wait(TableName=REVIEW_OVERFLOW_TABLE_NAME)
+            logger.info("Table '%s' créée avec succès", REVIEW_OVERFLOW_TABLE_NAME, extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de l'ajout de la critique au film: {e}\033[0m")
+            logger.error("Erreur lors de la création de la table '%s': %s", REVIEW_OVERFLOW_TABLE_NAME, e)
 
-    # Exo 24 : Rechercher des films dont une critique contient le mot "Amazing"
-    def query_movies_with_amazing_reviews(self):
+    def create_stats_table(self):
         try:
-            print(f"Recherche des films dont une critique contient le mot 'Amazing'...")
-            response = self.table.scan(
-                ProjectionExpression="movie_id, details.reviews"
+            logger.info("Début de la création de la table '%s'...", STATS_TABLE_NAME)
+            self.resource.create_table(
+                TableName=STATS_TABLE_NAME,
+                KeySchema=[
+                    {
+                        'AttributeName': 'stat',
+                        'KeyType': 'HASH'  # Clé de partition : 'total', 'genre#<genre>' ou 'year#<année>'
+                    }
+                ],
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'stat',
+                        'AttributeType': 'S'
+                    }
+                ],
+                ProvisionedThroughput={
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
             )
-            items = response.get('Items', [])
+            self.client.get_waiter('table_exists').wait(TableName=STATS_TABLE_NAME)
+            logger.info("Table '%s' créée avec succès", STATS_TABLE_NAME, extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de la création de la table '%s': %s", STATS_TABLE_NAME, e)
+
+    # Ajoute les termes des critiques à l'index inversé (écritures idempotentes)
+    @_instrumented
+    def index_reviews(self, movie_id, release_year, reviews):
+        terms = set()
+        for review in reviews:
+            terms |= review_terms(review.get('comment', ''))
+        with self.resource.Table(REVIEW_INDEX_TABLE_NAME).batch_writer(overwrite_by_pkeys=['term', 'movie_key']) as batch:
+            for term in terms:
+                batch.put_item(
+                    Item={
+                        'term': term,
+                        'movie_key': f"{movie_id}#{release_year}",
+                        'movie_id': movie_id,
+                        'release_year': release_year
+                    }
+                )
+
+    # Films indexés pour un terme, en suivant la pagination de l'index
+    def _movies_for_term(self, term):
+        index_table = self.resource.Table(REVIEW_INDEX_TABLE_NAME)
+        query_kwargs = build_expressions({
+            'KeyConditionExpression': Key('term').eq(term),
+            'ProjectionExpression': 'movie_id, release_year'
+        })
+        keys = set()
+        while True:
+            response = index_table.query(**query_kwargs)
+            keys.update((item['movie_id'], item['release_year']) for item in response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                return keys
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    # Recherche plein texte : tous les termes doivent apparaître dans les critiques (ET)
+    @_instrumented
+    def search_reviews(self, text):
+        try:
+            logger.info("Recherche des films dont les critiques contiennent '%s'...", text)
+            terms = review_terms(text)
+            if not terms:
+                return []
+            keys = None
+            for term in terms:
+                term_keys = self._movies_for_term(term)
+                keys = term_keys if keys is None else keys & term_keys
+                if not keys:
+                    break
+            keys = sorted(keys) if keys else []
+            movies = self.get_movies(keys, projection_expression="details.reviews, reviews_spilled") if keys else []
+
+            # L'index n'est jamais nettoyé : on écarte les films supprimés ou dont les critiques ont été remplacées
             matching_movies = []
-
-            for item in items:
-                reviews = item.get('details', {}).get('reviews', [])
+            for key, movie in zip(keys, movies):
+                if movie is None:
+                    continue
+                reviews = movie.get('details', {}).get('reviews', [])
+                if movie.get('reviews_spilled'):
+                    reviews = self.get_movie_reviews(*key)
+                movie_terms = set()
                 for review in reviews:
-                    if 'comment' in review and 'Amazing' in review['comment']:
-                        matching_movies.append(item)
-                        break  # Exit inner loop if a match is found
+                    movie_terms |= review_terms(review.get('comment', ''))
+                if terms <= movie_terms:
+                    matching_movies.append(movie)
 
-            for movie in matching_movies:
-                print(movie)
+            log_items(logger, matching_movies)
             return matching_movies
         except Exception as e:
-            print(f"\033[91mErreur lors de la recherche des films avec des critiques contenant 'Amazing': {e}\033[0m")
+            logger.error("Erreur lors de la recherche des films avec des critiques contenant '%s': %s", text, e)
             return []
 
+    # Reconstruit l'index inversé à partir des critiques existantes (scan unique, hors chemin de requête)
+    @_instrumented
+    def rebuild_review_index(self, page_size=None, total_segments=None):
+        try:
+            logger.info("Reconstruction de l'index des critiques de la table %s...", self._table_name)
+            count = 0
+            for item in self.scan_items(
+                    page_size=page_size,
+                    total_segments=total_segments,
+                    ProjectionExpression="movie_id, release_year, details.reviews, reviews_spilled"
+            ):
+                reviews = item.get('details', {}).get('reviews', [])
+                if item.get('reviews_spilled'):
+                    reviews = self.get_movie_reviews(item['movie_id'], item['release_year'])
+                if reviews:
+                    self.index_reviews(item['movie_id'], item['release_year'], reviews)
+                    count += 1
+            logger.info("Critiques de %s films indexées", count, extra=SUCCESS)
+            return count
+        except Exception as e:
+            logger.error("Erreur lors de la reconstruction de l'index des critiques: %s", e)
+            return 0
+
     # Exo 25 : Mettre à jour le champ `duration` d'un film en augmentant sa valeur de 10 minutes
+    @_instrumented
+    @_invalidates_movie
     def increment_movie_duration(self, movie_id, release_year, increment):
         try:
-            print(f"Mise à jour de la durée du film avec ID {movie_id} et année de sortie {release_year}...")
-            response = self.table.update_item(
+            logger.info("Mise à jour de la durée du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            attributes = self._add_duration(movie_id, release_year, increment)
+            logger.info("Durée du film mise à jour avec succès: %s", body(attributes), extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour de la durée du film: %s", e)
+
+    def _add_duration(self, movie_id, release_year, increment):
+        response = self.table.update_item(
+            Key={
+                'movie_id': movie_id,
+                'release_year': release_year
+            },
+            UpdateExpression="set details.#d = details.#d + :inc, #d = details.#d + :inc",
+            ExpressionAttributeNames={
+                '#d': 'duration'
+            },
+            ExpressionAttributeValues={
+                ':inc': increment
+            },
+            ReturnValues="UPDATED_NEW"
+        )
+        # Second appel uniquement si la nouvelle durée change de bucket dans DurationIndex
+        new_duration = response['Attributes']['duration']
+        if duration_bucket(new_duration) != duration_bucket(new_duration - increment):
+            self.table.update_item(
                 Key={
                     'movie_id': movie_id,
                     'release_year': release_year
                 },
-                UpdateExpression="set details.#d = details.#d + :inc",
-                ExpressionAttributeNames={
-                    '#d': 'duration'
-                },
+                UpdateExpression="set duration_bucket = :b",
                 ExpressionAttributeValues={
-                    ':inc': increment
-                },
-                ReturnValues="UPDATED_NEW"
+                    ':b': duration_bucket(new_duration)
+                }
             )
-            print(f"\033[92mDurée du film mise à jour avec succès: {response['Attributes']}\033[0m")
-        except Exception as e:
-            print(f"\033[91mErreur lors de la mise à jour de la durée du film: {e}\033[0m")
+        return response['Attributes']
+
+    # Applique un delta agrégé à un compteur, en une seule mise à jour (lève l'erreur au lieu de la journaliser).
+    # Les attributs de premier niveau utilisent ADD ; les chemins imbriqués, que ADD ne gère pas,
+    # un SET avec `if_not_exists`. La durée passe par `_add_duration` pour garder DurationIndex cohérent.
+    @_instrumented
+    @_invalidates_movie
+    def apply_counter_delta(self, movie_id, release_year, attribute, delta):
+        if attribute in ('duration', 'details.duration'):
+            return self._add_duration(movie_id, release_year, delta)
+        path = attribute.split('.')
+        names = {f"#p{i}": name for i, name in enumerate(path)}
+        placeholder = ".".join(names)
+        if len(path) == 1:
+            update_expression = f"ADD {placeholder} :delta"
+            values = {':delta': delta}
+        else:
+            update_expression = f"SET {placeholder} = if_not_exists({placeholder}, :zero) + :delta"
+            values = {':delta': delta, ':zero': 0}
+        response = self.table.update_item(
+            Key={
+                'movie_id': movie_id,
+                'release_year': release_year
+            },
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_exists(movie_id)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues="UPDATED_NEW"
+        )
+        return response['Attributes']
+
+    # Tampon d'agrégation des compteurs (`counters.CounterBuffer`) pour les compteurs très sollicités
+    def counter_buffer(self, flush_interval=1.0, max_pending=1000, max_workers=8):
+        from counters import CounterBuffer
+        return CounterBuffer(self, flush_interval, max_pending, max_workers)
 
     # Exo 26 : Créer une table `Cinema` qui contient chacun les films et un nom
     def create_cinema_table(self):
         try:
-            print("Vérification de l'existence de la table 'Cinema'...")
+            logger.info("Vérification de l'existence de la table 'Cinema'...")
             if self.check_cinema_table_exists('Cinema'):
-                print("La table 'Cinema' existe déjà, suppression en cours...")
+                logger.info("La table 'Cinema' existe déjà, suppression en cours...")
                 self.delete_cinema_table('Cinema')
-                print("Table 'Cinema' supprimée")
+                logger.info("Table 'Cinema' supprimée")
 
-            print("Début de la création de la table 'Cinema'...")
+            logger.info("Début de la création de la table 'Cinema'...")
             self.resource.create_table(
                 TableName='Cinema',
                 KeySchema=[
@@ -607,9 +2060,9 @@ class DynamoDB:
                 }
             )
             self.resource.meta.client.get_waiter('table_exists').wait(TableName='Cinema')
-            print("\033[92mTable 'Cinema' créée avec succès\033[0m")
+            logger.info("Table 'Cinema' créée avec succès", extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la création de la table 'Cinema': {e}\033[0m")
+            logger.error("Erreur lors de la création de la table 'Cinema': %s", e)
 
     def check_cinema_table_exists(self, table_name):
         try:
@@ -623,13 +2076,14 @@ class DynamoDB:
             table = self.resource.Table(table_name)
             table.delete()
             self.resource.meta.client.get_waiter('table_not_exists').wait(TableName=table_name)
-            print(f"\033[92mTable '{table_name}' supprimée avec succès\033[0m")
+            logger.info("Table '%s' supprimée avec succès", table_name, extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de la suppression de la table '{table_name}': {e}\033[0m")
+            logger.error("Erreur lors de la suppression de la table '%s': %s", table_name, e)
 
+    @_instrumented
     def add_movies_to_cinema(self, cinema_id, movie_ids):
         try:
-            print(f"Ajout des films au cinéma avec ID {cinema_id}...")
+            logger.info("Ajout des films au cinéma avec ID %s...", cinema_id)
             cinema_table = self.resource.Table('Cinema')
             response = cinema_table.update_item(
                 Key={
@@ -641,25 +2095,30 @@ class DynamoDB:
                 },
                 ReturnValues="UPDATED_NEW"
             )
-            print(f"\033[92mFilms ajoutés au cinéma avec succès: {response['Attributes']}\033[0m")
+            logger.info("Films ajoutés au cinéma avec succès: %s", body(response['Attributes']), extra=SUCCESS)
         except Exception as e:
-            print(f"\033[91mErreur lors de l'ajout des films au cinéma: {e}\033[0m")
+            logger.error("Erreur lors de l'ajout des films au cinéma: %s", e)
 
-    def get_all_movie_ids(self):
+    @_instrumented
+    def get_all_movie_ids(self, page_size=None, limit=None, total_segments=None):
         try:
-            print("Récupération de tous les IDs de films...")
-            response = self.table.scan(
+            logger.info("Récupération de tous les IDs de films...")
+            movie_ids = [item['movie_id'] for item in self.scan_items(
+                page_size=page_size,
+                limit=limit,
+                total_segments=total_segments,
                 ProjectionExpression="movie_id"
-            )
-            movie_ids = [item['movie_id'] for item in response['Items']]
+            )]
             return movie_ids
         except Exception as e:
-            print(f"\033[91mErreur lors de la récupération des IDs de films: {e}\033[0m")
+            logger.error("Erreur lors de la récupération des IDs de films: %s", e)
             return []
 
 
 def main():
-    db = DynamoDB()
+    # Le script d'exercices affiche aussi chaque item renvoyé (niveau DEBUG)
+    configure_logging(level=logging.DEBUG)
+    db = DynamoDB(schema_mode='ensure')
 
     # Exo 3 : Insertion d'un film
     db.insert_movie(
@@ -769,7 +2228,7 @@ def main():
     db.add_movies_to_cinema('cinema-1', movie_ids)
     db.add_movies_to_cinema('cinema-2', ['uuid-1', 'uuid-3'])
 
-    print("\033[92mFin de l'application\033[0m")
+    logger.info("Fin de l'application", extra=SUCCESS)
 
 
 # Exemple d'utilisation
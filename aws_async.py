@@ -0,0 +1,413 @@
+import asyncio
+import logging
+from decimal import Decimal
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import AioSession
+from boto3.dynamodb.conditions import Key, Attr, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+from aggregates import merge_deltas, movie_deltas, stats_updates
+from aws import PROFILE_NAME, STATS_TABLE_NAME, TABLE_NAME, movie_to_item, duration_bucket, details_index_update
+from logs import SUCCESS, body
+from ratelimit import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Tailles maximales des appels BatchWriteItem / nombre de requêtes simultanées par défaut
+BATCH_SIZE = 25
+MAX_CONCURRENCY = 64
+
+
+class AsyncDynamoDB:
+    # Variante asyncio de `DynamoDB` : un seul client aiobotocore (pool aiohttp partagé) pour toutes les requêtes.
+    # maintain_stats : comme pour `DynamoDB`, les écritures de films tiennent à jour `STATS_TABLE_NAME` dès que
+    # cette table existe. Chaque écriture renvoie la version remplacée (ReturnValues=ALL_OLD) et les deltas sont
+    # appliqués juste après, hors transaction : un arrêt entre les deux laisse un écart, corrigé par
+    # `DynamoDB.rebuild_stats`.
+    def __init__(self, table_name=TABLE_NAME, profile_name=PROFILE_NAME, endpoint_url=None, region_name=None,
+                 max_concurrency=MAX_CONCURRENCY, maintain_stats=True):
+        self._table_name = table_name
+        self._session = AioSession(profile=profile_name)
+        self._endpoint_url = endpoint_url  # ex. DynamoDB Local ou moto_server pour les tests
+        self._region_name = region_name
+        self._config = AioConfig(max_pool_connections=max_concurrency)
+        self._client_context = None
+        self.client = None
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+        self.maintain_stats = maintain_stats
+        self._stats_enabled = None  # vérifié au premier besoin
+
+    async def __aenter__(self):
+        self._client_context = self._session.create_client(
+            'dynamodb',
+            endpoint_url=self._endpoint_url,
+            region_name=self._region_name,
+            config=self._config
+        )
+        self.client = await self._client_context.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client_context.__aexit__(exc_type, exc, tb)
+        self.client = None
+
+    # Conversion entre items Python et format DynamoDB (le client bas niveau n'a pas la couche `Table`)
+    def _serialize(self, item):
+        return {k: self._serializer.serialize(v) for k, v in item.items()}
+
+    def _deserialize(self, item):
+        return {k: self._deserializer.deserialize(v) for k, v in item.items()}
+
+    def _key(self, movie_id, release_year):
+        return self._serialize({'movie_id': movie_id, 'release_year': release_year})
+
+    # Traduit les conditions `Key`/`Attr` de boto3 en paramètres d'expression du client bas niveau
+    def _expression_kwargs(self, key_condition=None, filter_expression=None):
+        builder = ConditionExpressionBuilder()
+        kwargs, names, values = {}, {}, {}
+        for param, condition, is_key in (('KeyConditionExpression', key_condition, True),
+                                         ('FilterExpression', filter_expression, False)):
+            if condition is None:
+                continue
+            expression = builder.build_expression(condition, is_key_condition=is_key)
+            kwargs[param] = expression.condition_expression
+            names.update(expression.attribute_name_placeholders)
+            values.update(expression.attribute_value_placeholders)
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        if values:
+            kwargs['ExpressionAttributeValues'] = self._serialize(values)
+        return kwargs
+
+    async def _stats_active(self):
+        if self._stats_enabled is None:
+            self._stats_enabled = False
+            if self.maintain_stats:
+                try:
+                    await self.client.describe_table(TableName=STATS_TABLE_NAME)
+                    self._stats_enabled = True
+                except self.client.exceptions.ResourceNotFoundException:
+                    logger.warning("Table %s absente : agrégats non tenus à jour", STATS_TABLE_NAME)
+        return self._stats_enabled
+
+    async def _apply_stats_deltas(self, deltas):
+        updates = stats_updates(STATS_TABLE_NAME, deltas)
+        try:
+            await asyncio.gather(*(self.client.update_item(
+                TableName=update['TableName'],
+                Key=self._serialize(update['Key']),
+                UpdateExpression=update['UpdateExpression'],
+                ExpressionAttributeNames=update['ExpressionAttributeNames'],
+                ExpressionAttributeValues=self._serialize(update['ExpressionAttributeValues'])
+            ) for update in updates))
+        except self.client.exceptions.ResourceNotFoundException as e:
+            logger.warning("Agrégats non tenus à jour: %s", e)
+            self._stats_enabled = False
+
+    # Écrit un film et renvoie la version remplacée (None si nouveau ou sans agrégats à tenir)
+    async def _put_movie(self, item, stats):
+        if not stats:
+            await self.client.put_item(TableName=self._table_name, Item=self._serialize(item))
+            return None
+        response = await self.client.put_item(TableName=self._table_name, Item=self._serialize(item),
+                                              ReturnValues="ALL_OLD")
+        return self._deserialize(response['Attributes']) if 'Attributes' in response else None
+
+    async def insert_movie(self, movie_id, title, release_year, genre, rating, details):
+        try:
+            logger.info("Insertion du film %s dans la table %s...", title, self._table_name)
+            item = movie_to_item({'movie_id': movie_id, 'title': title, 'release_year': release_year,
+                                  'genre': genre, 'rating': rating, 'details': details})
+            stats = await self._stats_active()
+            old = await self._put_movie(item, stats)
+            if stats:
+                await self._apply_stats_deltas(merge_deltas(movie_deltas(old, -1), movie_deltas(item)))
+            logger.info("Film %s inséré avec succès", title, extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de l'insertion du film %s: %s", title, e)
+
+    async def _write_batch(self, requests, semaphore, max_retries=8):
+        request_items = {self._table_name: requests}
+        attempt = 0
+        async with semaphore:
+            while request_items:
+                response = await self.client.batch_write_item(RequestItems=request_items)
+                request_items = response.get('UnprocessedItems') or {}
+                if request_items:
+                    if attempt >= max_retries:
+                        raise RuntimeError(f"Items non traités après {attempt} tentatives")
+                    attempt += 1
+                    await asyncio.sleep(backoff_delay(attempt))
+
+    async def insert_movies_batch(self, movies, max_concurrency=16):
+        try:
+            logger.info("Insertion de plusieurs films dans la table %s...", self._table_name)
+            semaphore = asyncio.Semaphore(max_concurrency)
+            # BatchWriteItem rejette un lot contenant deux fois la même clé : la dernière version l'emporte
+            items = {(movie['movie_id'], movie['release_year']): movie for movie in map(movie_to_item, movies)}
+            if await self._stats_active():
+                # BatchWriteItem ne renvoie pas les versions remplacées : un PutItem par film. Les deltas des films
+                # écrits sont appliqués même si d'autres écritures échouent.
+                deltas = {}
+
+                async def put(item):
+                    async with semaphore:
+                        old = await self._put_movie(item, True)
+                    merge_deltas(deltas, movie_deltas(old, -1))
+                    merge_deltas(deltas, movie_deltas(item))
+
+                results = await asyncio.gather(*(put(item) for item in items.values()), return_exceptions=True)
+                await self._apply_stats_deltas(deltas)
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+            else:
+                requests = [{'PutRequest': {'Item': self._serialize(item)}} for item in items.values()]
+                await asyncio.gather(*(self._write_batch(requests[i:i + BATCH_SIZE], semaphore)
+                                       for i in range(0, len(requests), BATCH_SIZE)))
+            logger.info("Tous les films ont été insérés avec succès", extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de l'insertion de plusieurs films: %s", e)
+
+    async def get_movie(self, movie_id, release_year):
+        try:
+            logger.info("Récupération du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            response = await self.client.get_item(TableName=self._table_name, Key=self._key(movie_id, release_year))
+            item = response.get('Item')
+            if item:
+                item = self._deserialize(item)
+                logger.info("Film trouvé: %s", body(item), extra=SUCCESS)
+            else:
+                logger.error("Film non trouvé")
+            return item
+        except Exception as e:
+            logger.error("Erreur lors de la récupération du film: %s", e)
+            return None
+
+    # Requête paginée sur un index, suit `LastEvaluatedKey`
+    async def query_items(self, index_name, key_condition, filter_expression=None, page_size=None, limit=None):
+        kwargs = dict(TableName=self._table_name, IndexName=index_name,
+                      **self._expression_kwargs(key_condition, filter_expression))
+        if page_size:
+            kwargs['Limit'] = page_size
+        items = []
+        while True:
+            response = await self.client.query(**kwargs)
+            items.extend(self._deserialize(item) for item in response.get('Items', []))
+            if limit is not None and len(items) >= limit:
+                return items[:limit]
+            if not response.get('LastEvaluatedKey'):
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    async def query_movies_by_genre(self, genre):
+        try:
+            logger.info("Recherche des films du genre %s...", genre)
+            return await self.query_items('GenreIndex', Key('genre').eq(genre))
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films par genre %s: %s", genre, e)
+            return []
+
+    async def query_movies_by_genre_and_year(self, genre, min_year):
+        try:
+            logger.info("Recherche des films du genre %s sortis après l'année %s...", genre, min_year)
+            return await self.query_items('GenreIndex', Key('genre').eq(genre) & Key('release_year').gt(min_year))
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films par genre et année: %s", e)
+            return []
+
+    async def query_movies_by_release_year_gsi(self, release_year):
+        try:
+            logger.info("Recherche des films sortis en %s en utilisant le GSI...", release_year)
+            return await self.query_items('ReleaseYearRatingIndex', Key('release_year').eq(release_year))
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films sortis en %s: %s", release_year, e)
+            return []
+
+    async def query_movies_by_rating_gsi(self, release_year, rating):
+        try:
+            logger.info("Recherche des films avec une note supérieure à %s pour l'année %s...", rating, release_year)
+            return await self.query_items(
+                'ReleaseYearRatingIndex',
+                Key('release_year').eq(release_year) & Key('rating').gt(Decimal(str(rating)))
+            )
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films avec une note supérieure à %s: %s", rating, e)
+            return []
+
+    async def _update(self, movie_id, release_year, update_expression, values, names=None,
+                      return_values="UPDATED_NEW", condition=None):
+        kwargs = dict(
+            TableName=self._table_name,
+            Key=self._key(movie_id, release_year),
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=self._serialize(values),
+            ReturnValues=return_values
+        )
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        if condition:
+            kwargs['ConditionExpression'] = condition
+        response = await self.client.update_item(**kwargs)
+        return self._deserialize(response.get('Attributes', {}))
+
+    async def update_movie_rating(self, movie_id, release_year, new_rating):
+        try:
+            logger.info("Mise à jour de la note du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            rating = Decimal(str(new_rating))
+            if await self._stats_active():
+                # Comme `DynamoDB.update_movie_rating` : un film absent n'est pas créé (ni compté)
+                try:
+                    old = await self._update(movie_id, release_year, "set rating = :r", {':r': rating},
+                                             return_values="ALL_OLD", condition="attribute_exists(movie_id)")
+                except self.client.exceptions.ConditionalCheckFailedException:
+                    logger.error("Film non trouvé, note non mise à jour")
+                    return
+                await self._apply_stats_deltas(merge_deltas(movie_deltas(old, -1),
+                                                            movie_deltas(dict(old, rating=rating))))
+                attributes = {'rating': rating}
+            else:
+                attributes = await self._update(movie_id, release_year, "set rating = :r", {':r': rating})
+            logger.info("Note du film mise à jour avec succès: %s", body(attributes), extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour de la note du film: %s", e)
+
+    async def update_movie_details(self, movie_id, release_year, new_details):
+        try:
+            logger.info("Mise à jour des détails du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            set_clauses, remove_clauses, names, values = details_index_update(new_details)
+            update_expression = "set " + ", ".join(["details = :d"] + set_clauses)
+            if remove_clauses:
+                update_expression += " remove " + ", ".join(remove_clauses)
+            attributes = await self._update(movie_id, release_year, update_expression,
+                                            dict(values, **{':d': new_details}), names=names)
+            logger.info("Détails du film mis à jour avec succès: %s", body(attributes), extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour des détails du film: %s", e)
+
+    async def increment_movie_duration(self, movie_id, release_year, increment):
+        try:
+            logger.info("Mise à jour de la durée du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            attributes = await self._update(movie_id, release_year,
+                                            "set details.#d = details.#d + :inc, #d = details.#d + :inc",
+                                            {':inc': increment}, names={'#d': 'duration'})
+            # Second appel uniquement si la nouvelle durée change de bucket dans DurationIndex
+            new_duration = attributes['duration']
+            if duration_bucket(new_duration) != duration_bucket(new_duration - increment):
+                await self._update(movie_id, release_year, "set duration_bucket = :b",
+                                   {':b': duration_bucket(new_duration)})
+            logger.info("Durée du film mise à jour avec succès: %s", body(attributes), extra=SUCCESS)
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour de la durée du film: %s", e)
+
+    async def delete_movie(self, movie_id, release_year):
+        try:
+            logger.info("Suppression du film avec ID %s et année de sortie %s...", movie_id, release_year)
+            response = await self.client.delete_item(
+                TableName=self._table_name,
+                Key=self._key(movie_id, release_year),
+                ReturnValues="ALL_OLD"
+            )
+            if 'Attributes' in response:
+                old = self._deserialize(response['Attributes'])
+                if await self._stats_active():
+                    await self._apply_stats_deltas(movie_deltas(old, -1))
+                logger.info("Film supprimé avec succès: %s", body(old), extra=SUCCESS)
+            else:
+                logger.error("Film non trouvé, rien à supprimer")
+        except Exception as e:
+            logger.error("Erreur lors de la suppression du film: %s", e)
+
+    # Scan d'un segment, les pages sont déposées dans une file asyncio bornée. Une tâche annulée (consommateur
+    # arrêté) ne dépose pas de marqueur de fin : la file pleine ne serait plus jamais vidée.
+    async def _scan_segment(self, kwargs, pages):
+        kwargs = dict(kwargs)
+        try:
+            while True:
+                response = await self.client.scan(**kwargs)
+                await pages.put(response)
+                if not response.get('LastEvaluatedKey'):
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception:
+            # `CancelledError` n'hérite pas d'`Exception` : seules les erreurs de scan déposent le marqueur
+            await pages.put(None)
+            raise
+        await pages.put(None)
+
+    # Générateur asynchrone de pages, séquentiel ou segmenté (`Segment`/`TotalSegments`) en parallèle
+    async def scan_pages(self, filter_expression=None, page_size=None, total_segments=None, **scan_kwargs):
+        kwargs = dict(TableName=self._table_name, **self._expression_kwargs(filter_expression=filter_expression),
+                      **scan_kwargs)
+        if page_size:
+            kwargs['Limit'] = page_size
+        segments = total_segments or 1
+        pages = asyncio.Queue(maxsize=segments * 2)
+        tasks = [asyncio.ensure_future(self._scan_segment(
+            dict(kwargs, Segment=segment, TotalSegments=segments) if total_segments else kwargs, pages))
+            for segment in range(segments)]
+        try:
+            remaining = segments
+            while remaining:
+                page = await pages.get()
+                if page is None:
+                    remaining -= 1
+                    continue
+                yield page
+            for task in tasks:
+                task.result()  # Propage l'erreur d'un segment éventuel
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def scan_items(self, filter_expression=None, page_size=None, limit=None, total_segments=None,
+                         **scan_kwargs):
+        count = 0
+        async for page in self.scan_pages(filter_expression, page_size, total_segments, **scan_kwargs):
+            for item in page.get('Items', []):
+                yield self._deserialize(item)
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    async def _collect(self, filter_expression, page_size, limit, total_segments):
+        return [item async for item in self.scan_items(filter_expression, page_size, limit, total_segments)]
+
+    async def query_movies_by_release_year(self, year, page_size=None, limit=None, total_segments=None):
+        try:
+            logger.info("Recherche des films sortis après l'année %s...", year)
+            return await self._collect(Attr('release_year').gt(year), page_size, limit, total_segments)
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films sortis après %s: %s", year, e)
+            return []
+
+    async def query_movies_by_rating(self, rating, page_size=None, limit=None, total_segments=None):
+        try:
+            logger.info("Recherche des films avec une note supérieure à %s...", rating)
+            return await self._collect(Attr('rating').gt(Decimal(str(rating))), page_size, limit, total_segments)
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films avec une note supérieure à %s: %s", rating, e)
+            return []
+
+    async def query_movies_by_director(self, director, page_size=None, limit=None):
+        try:
+            logger.info("Recherche des films réalisés par %s...", director)
+            return await self.query_items('DirectorIndex', Key('director').eq(director), page_size=page_size,
+                                          limit=limit)
+        except Exception as e:
+            logger.error("Erreur lors de la recherche des films réalisés par %s: %s", director, e)
+            return []
+
+    async def count_total_movies(self, page_size=None, total_segments=None):
+        try:
+            logger.info("Comptage du nombre total de films dans la table...")
+            count = 0
+            async for page in self.scan_pages(page_size=page_size, total_segments=total_segments, Select='COUNT'):
+                count += page['Count']
+            logger.info("Nombre total de films dans la table: %s", count, extra=SUCCESS)
+            return count
+        except Exception as e:
+            logger.error("Erreur lors du comptage des films: %s", e)
+            return 0
@@ -0,0 +1,23 @@
+import argparse
+
+from aws import DynamoDB, PROFILE_NAME, TABLE_NAME
+from logs import configure_logging
+
+
+# Crée les GSIs manquants puis renseigne les attributs indexés des films existants
+def main():
+    parser = argparse.ArgumentParser(description="Rattrapage des attributs indexés (réalisateur, durée, titre)")
+    parser.add_argument('--table', default=TABLE_NAME)
+    parser.add_argument('--profile', default=PROFILE_NAME)
+    parser.add_argument('--segments', type=int, default=None, help="Nombre de segments du scan parallèle")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--log-format', choices=['console', 'json', 'quiet'], default='console')
+    args = parser.parse_args()
+    configure_logging(args.log_format)
+
+    db = DynamoDB(table_name=args.table, profile_name=args.profile, schema_mode='ensure')
+    db.backfill_index_attributes(total_segments=args.segments, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from logs import configure_logging
+from metrics import Metrics, percentile
+
+# Banc d'essai reproductible : moto remplace DynamoDB et S3 dans le processus, les fichiers à copier sont servis par
+# un serveur HTTP local. Aucun appel réseau vers AWS.
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Sci-Fi', 'Thriller', 'Romance', 'Documentary', 'Animation', 'Crime']
+WORDS = ['amazing', 'great', 'boring', 'masterpiece', 'slow', 'brilliant', 'awful', 'fun', 'dark', 'moving', 'loved',
+         'classic', 'overrated', 'stunning', 'weak', 'epic']
+MIN_YEAR = 1950
+MAX_YEAR = 2024
+# Genre réservé au test de suppression en masse, jamais utilisé par le catalogue principal
+DELETE_GENRE = 'BenchDelete'
+# Écart relatif de latence médiane au-delà duquel `compare` signale une régression
+REGRESSION_THRESHOLD = 0.2
+
+
+# Identifiants factices et profil `dev` dans des fichiers temporaires : les modules créent leurs sessions sans AWS
+def _fake_aws_environment(directory):
+    credentials = os.path.join(directory, 'credentials')
+    config = os.path.join(directory, 'config')
+    with open(credentials, 'w') as f:
+        f.write("[default]\naws_access_key_id = testing\naws_secret_access_key = testing\n"
+                "[dev]\naws_access_key_id = testing\naws_secret_access_key = testing\n")
+    with open(config, 'w') as f:
+        f.write("[default]\nregion = eu-west-1\n[profile dev]\nregion = eu-west-1\n")
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = credentials
+    os.environ['AWS_CONFIG_FILE'] = config
+    os.environ['AWS_DEFAULT_REGION'] = 'eu-west-1'
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN', 'AWS_PROFILE'):
+        os.environ.pop(name, None)
+
+
+# Catalogue synthétique déterministe, généré en flux
+def synthetic_movies(count, reviews_per_movie, seed, genre=None, prefix='bench'):
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield {
+            'movie_id': f"{prefix}-{i}",
+            'title': " ".join(rnd.choice(WORDS).capitalize() for _ in range(rnd.randint(1, 3))),
+            'release_year': rnd.randint(MIN_YEAR, MAX_YEAR),
+            'genre': genre or rnd.choice(GENRES),
+            'rating': Decimal(str(round(rnd.uniform(1, 10), 1))),
+            'details': {
+                'director': f"Director {rnd.randint(1, 500)}",
+                'duration': rnd.randint(60, 240),
+                'sequels': 0,
+                'reviews': [{'reviewer': f"user{rnd.randint(1, 10000)}",
+                             'comment': " ".join(rnd.choice(WORDS) for _ in range(5))}
+                            for _ in range(reviews_per_movie)]
+            }
+        }
+
+
+def latency_stats(latencies, seconds=None, items=None):
+    values = sorted(latencies)
+    seconds = sum(values) if seconds is None else seconds
+    stats = {
+        'calls': len(values),
+        'seconds': seconds,
+        'ops_per_second': len(values) / seconds if seconds else 0.0,
+        'latency_mean': sum(values) / len(values) if values else 0.0,
+        'latency_p50': percentile(values, 50),
+        'latency_p95': percentile(values, 95),
+        'latency_p99': percentile(values, 99)
+    }
+    if items is not None:
+        stats['items'] = items
+        stats['items_per_second'] = items / seconds if seconds else 0.0
+    return stats
+
+
+# Requêtes et items cumulés sur toutes les opérations mesurées
+def _totals(metrics):
+    snapshots = metrics.snapshot().values()
+    return sum(s['requests'] for s in snapshots), sum(s['items'] for s in snapshots)
+
+
+# Chaque mesure se voit attribuer les requêtes émises pendant ses appels, y compris celles des méthodes
+# qu'elle délègue : deux mesures d'une même méthode (ex. comptage par statistiques ou par scan) restent
+# distinctes, et la préparation hors chronomètre n'est pas comptée
+class _Timer:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.latencies = []
+        self.requests = 0
+        self.items = 0
+
+    def __call__(self, fn, *args):
+        requests, items = _totals(self.metrics)
+        start = time.perf_counter()
+        fn(*args)
+        self.latencies.append(time.perf_counter() - start)
+        after_requests, after_items = _totals(self.metrics)
+        self.requests += after_requests - requests
+        self.items += after_items - items
+
+    def stats(self):
+        stats = latency_stats(self.latencies)
+        stats['requests'] = self.requests
+        stats['items_read_or_written'] = self.items
+        return stats
+
+
+def _time(metrics, fn, repeat):
+    timer = _Timer(metrics)
+    for i in range(repeat):
+        timer(fn, i)
+    return timer.stats()
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    # Sert /<taille> : un contenu déterministe de <taille> octets
+    def do_GET(self):
+        size = int(self.path.strip('/').split('-')[0])
+        self.send_response(200)
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        chunk = b'x' * 65536
+        remaining = size
+        while remaining:
+            self.wfile.write(chunk[:remaining])
+            remaining -= min(remaining, len(chunk))
+
+    def log_message(self, format, *args):
+        pass
+
+
+# plain_db : même table sans agrégats, pour mesurer leur coût sur les écritures en lot
+def _dynamodb_benchmarks(db, plain_db, metrics, movies, repeat, scan_repeat, seed):
+    rnd = random.Random(seed)
+
+    # La clé complète est relue une fois pour ne pas dépendre de l'année tirée au seed
+    years = {}
+    for item in db.raw_scan_items(ProjectionExpression="movie_id, release_year"):
+        years[item['movie_id']] = item['release_year']
+
+    def key(_=None):
+        movie_id = f"bench-{rnd.randrange(movies)}"
+        return movie_id, years[movie_id]
+
+    def year(_=None):
+        return rnd.randint(MIN_YEAR, MAX_YEAR)
+
+    def new_movie(i):
+        return next(synthetic_movies(1, 2, seed + i, prefix=f"bench-new-{i}"))
+
+    benchmarks = [
+        ('insert_movie', repeat, lambda i: db.insert_movie(**new_movie(i))),
+        ('insert_movies_batch', repeat, lambda i: db.insert_movies_batch(
+            list(synthetic_movies(25, 2, seed + i, prefix=f"bench-batch-{i}")))),
+        ('insert_movies_batch_without_stats', repeat, lambda i: plain_db.insert_movies_batch(
+            list(synthetic_movies(25, 2, seed + i, prefix=f"bench-plain-{i}")))),
+        ('get_movie', repeat, lambda i: db.get_movie(*key())),
+        ('get_movies', repeat, lambda i: db.get_movies([key() for _ in range(100)])),
+        ('query_movies_by_genre', repeat, lambda i: db.query_movies_by_genre(rnd.choice(GENRES))),
+        ('query_movies_by_genre_and_year', repeat, lambda i: db.query_movies_by_genre_and_year(
+            rnd.choice(GENRES), year())),
+        ('query_movies_by_release_year_gsi', repeat, lambda i: db.query_movies_by_release_year_gsi(year())),
+        ('query_movies_by_rating_gsi', repeat, lambda i: db.query_movies_by_rating_gsi(year(), 7.5)),
+        ('query_top_rated_movies', repeat, lambda i: db.query_top_rated_movies(1990, 2020, k=10)),
+        ('query_movies_by_director', repeat, lambda i: db.query_movies_by_director(
+            f"Director {rnd.randint(1, 500)}")),
+        ('query_movies_by_duration', repeat, lambda i: db.query_movies_by_duration(230)),
+        ('query_movies_by_duration_range', repeat, lambda i: db.query_movies_by_duration_range(120, 125)),
+        ('query_movies_by_title_starting_with', repeat, lambda i: db.query_movies_by_title_starting_with(
+            rnd.choice(WORDS).capitalize())),
+        ('update_movie_rating', repeat, lambda i: db.update_movie_rating(*key(), 7.0)),
+        ('add_movie_awards', repeat, lambda i: db.add_movie_awards(*key(), {"oscars": 1})),
+        ('update_movie_details', repeat, lambda i: db.update_movie_details(
+            *key(), {"director": "Director 1", "duration": 120, "sequels": 1})),
+        ('increment_movie_sequels', repeat, lambda i: db.increment_movie_sequels(*key())),
+        ('increment_movie_duration', repeat, lambda i: db.increment_movie_duration(*key(), 1)),
+        ('add_movie_reviews', repeat, lambda i: db.add_movie_reviews(
+            *key(), [{'reviewer': 'bench', 'comment': 'great fun'}] * 2)),
+        ('add_single_review', repeat, lambda i: db.add_single_review(*key(), {'reviewer': 'bench', 'comment': 'epic'})),
+        ('search_reviews', repeat, lambda i: db.search_reviews(" ".join(rnd.sample(WORDS, 2)))),
+        ('query_movies_by_release_year', scan_repeat, lambda i: db.query_movies_by_release_year(2020)),
+        ('query_movies_by_rating', scan_repeat, lambda i: db.query_movies_by_rating(9.8)),
+        ('count_total_movies', repeat, lambda i: db.count_total_movies()),
+        ('count_total_movies_scan', scan_repeat, lambda i: db.count_total_movies(from_scan=True)),
+        ('get_movie_stats', repeat, lambda i: db.get_movie_stats(genre=rnd.choice(GENRES))),
+        ('get_all_movie_ids', scan_repeat, lambda i: db.get_all_movie_ids()),
+        ('raw_scan_columns', scan_repeat, lambda i: db.raw_scan_columns()),
+        ('delete_movie', repeat, lambda i: db.delete_movie(f"bench-new-{i}-0", new_movie(i)['release_year'])),
+    ]
+    results = {}
+    for name, count, fn in benchmarks:
+        results[name] = _time(metrics, fn, count)
+
+    # Suppression en masse sur un genre dédié, réensemencé avant chaque mesure
+    timer = _Timer(metrics)
+    for i in range(repeat):
+        db.bulk_insert_movies(synthetic_movies(100, 0, seed + i, genre=DELETE_GENRE, prefix=f"bench-del-{i}"))
+        timer(db.delete_movies_by_genre, DELETE_GENRE)
+    results['delete_movies_by_genre'] = timer.stats()
+    return results
+
+
+def _s3_benchmarks(files, file_size, stream_size, workers):
+    import s3aws
+
+    bucket = 'bench-bucket'
+    s3aws.s3_client().create_bucket(
+        Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        results = {}
+        pairs = [(f"{base_url}/{file_size}-{i}", f"batch/{i}.bin") for i in range(files)]
+        results['upload_files_to_s3'] = s3aws.upload_files_to_s3(pairs, bucket, max_workers=workers)
+        if stream_size:
+            pairs = [(f"{base_url}/{stream_size}-{i}", f"stream/{i}.bin") for i in range(max(1, files // 10))]
+            results['upload_files_to_s3_stream'] = s3aws.upload_files_to_s3(pairs, bucket, max_workers=workers,
+                                                                            stream=True)
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run(movies=10000, reviews=3, repeat=20, scan_repeat=3, seed=42, workers=8, cache_size=0, s3_files=100,
+        s3_file_size=64 * 1024, s3_stream_size=0):
+    from moto import mock_aws
+
+    with tempfile.TemporaryDirectory() as directory:
+        _fake_aws_environment(directory)
+        with mock_aws():
+            import aws
+
+            metrics = Metrics()
+            db = aws.DynamoDB(schema_mode='recreate', cache_size=cache_size, metrics=metrics)
+            report = {
+                'meta': {
+                    'movies': movies,
+                    'reviews': reviews,
+                    'repeat': repeat,
+                    'scan_repeat': scan_repeat,
+                    'seed': seed,
+                    'workers': workers,
+                    'cache_size': cache_size,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'started_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+                },
+                'seed': {},
+                'dynamodb': {},
+                's3': {}
+            }
+
+            stats = db.bulk_insert_movies(synthetic_movies(movies, reviews, seed), max_workers=workers)
+            report['seed']['bulk_insert_movies'] = stats
+            start = time.perf_counter()
+            indexed = db.rebuild_review_index()
+            report['seed']['rebuild_review_index'] = latency_stats([time.perf_counter() - start], items=indexed)
+
+            plain_db = aws.DynamoDB(cache_size=cache_size, metrics=metrics, maintain_stats=False)
+            report['dynamodb'] = _dynamodb_benchmarks(db, plain_db, metrics, movies, repeat, scan_repeat, seed)
+
+            if s3_files:
+                report['s3'] = _s3_benchmarks(s3_files, s3_file_size, s3_stream_size, workers)
+    return report
+
+
+# Compare deux rapports : renvoie les opérations dont la latence médiane s'est dégradée au-delà du seuil
+def compare(base, new, threshold=REGRESSION_THRESHOLD):
+    rows = []
+    for section in ('dynamodb', 's3'):
+        for name, new_stats in new.get(section, {}).items():
+            base_stats = base.get(section, {}).get(name)
+            if not base_stats or not base_stats.get('latency_p50'):
+                continue
+            ratio = new_stats['latency_p50'] / base_stats['latency_p50']
+            rows.append({
+                'operation': f"{section}.{name}",
+                'base_p50': base_stats['latency_p50'],
+                'new_p50': new_stats['latency_p50'],
+                'ratio': ratio,
+                'regression': ratio > 1 + threshold
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai DynamoDB/S3 sur des services simulés en local")
+    parser.add_argument('--movies', type=int, default=10000, help="Taille du catalogue synthétique")
+    parser.add_argument('--reviews', type=int, default=3, help="Critiques par film")
+    parser.add_argument('--repeat', type=int, default=20, help="Appels mesurés par méthode")
+    parser.add_argument('--scan-repeat', type=int, default=3, help="Appels mesurés par méthode de scan")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--cache-size', type=int, default=0)
+    parser.add_argument('--s3-files', type=int, default=100)
+    parser.add_argument('--s3-file-size', type=int, default=64 * 1024)
+    parser.add_argument('--s3-stream-size', type=int, default=0, help="Taille des fichiers copiés en mode flux")
+    parser.add_argument('--output', help="Fichier JSON du rapport (sortie standard par défaut)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="Compare deux rapports existants")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        rows = compare(base, new, args.threshold)
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        sys.exit(1 if any(row['regression'] for row in rows) else 0)
+
+    # Seules les erreurs sont journalisées, sur stderr : la sortie standard reste réservée au JSON
+    configure_logging(level=logging.WARNING, stream=sys.stderr)
+    report = run(args.movies, args.reviews, args.repeat, args.scan_repeat, args.seed, args.workers, args.cache_size,
+                 args.s3_files, args.s3_file_size, args.s3_stream_size)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    else:
+        json.dump(report, sys.stdout, indent=2, default=str)
+        sys.stdout.write('\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import csv
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decimal import Decimal
+from itertools import islice
+
+from botocore.exceptions import ClientError
+
+from aws import DynamoDB, PROFILE_NAME, TABLE_NAME, movie_to_item
+from clients import get_resource
+from logs import SUCCESS, configure_logging
+from metrics import bind_operation
+from ratelimit import THROTTLING_ERRORS, AdaptiveRateLimiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale d'un appel BatchWriteItem
+BATCH_SIZE = 25
+MAX_RETRIES = 10
+
+
+# Lecture en flux d'un fichier JSONL ou CSV, un film à la fois
+def read_movies(path):
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield {
+                    'movie_id': row['movie_id'],
+                    'title': row['title'],
+                    'release_year': int(row['release_year']),
+                    'genre': row['genre'],
+                    'rating': Decimal(row['rating']),
+                    # La colonne `details` contient un objet JSON
+                    'details': json.loads(row['details'], parse_float=Decimal) if row.get('details') else {}
+                }
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    # parse_float évite la conversion Decimal(str(...)) item par item
+                    yield json.loads(line, parse_float=Decimal)
+
+
+# Découpe un itérable en lots d'items DynamoDB sans le charger entièrement
+def chunked_items(items, size=BATCH_SIZE):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# BatchWriteItem rejette tout le lot si deux requêtes portent sur la même clé : la dernière l'emporte
+def unique_keys(items):
+    return list({(item['movie_id'], item['release_year']): item for item in items}.values())
+
+
+# Écritures en lot (BatchWriteItem) sans les agrégats de `aggregates` : BatchWriteItem ne renvoie pas les
+# versions remplacées. Avec `on_written`, chaque requête est envoyée seule (PutItem/DeleteItem avec
+# ReturnValues=ALL_OLD) et on_written(ancienne version ou None, nouvelle version ou None) reçoit la version
+# réellement remplacée ou supprimée, depuis les workers (voir `DynamoDB.stats_collector`). Sinon, recalculer
+# les agrégats avec rebuild_stats.py sur une table calme.
+class BulkLoader:
+    def __init__(self, client, table_name=TABLE_NAME, max_workers=8, max_retries=MAX_RETRIES):
+        self.client = client
+        self.table_name = table_name
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.items_written = 0
+        self.consumed_wcu = 0.0
+        self.retries = 0
+
+    def _backoff(self, attempt):
+        with self._lock:
+            self.retries += 1
+        time.sleep(backoff_delay(attempt))
+
+    def write_batch(self, items, on_written=None):
+        self._send([{'PutRequest': {'Item': item}} for item in unique_keys(items)], on_written)
+
+    # keys : clés primaires {'movie_id': ..., 'release_year': ...}
+    def delete_batch(self, keys, on_written=None):
+        self._send([{'DeleteRequest': {'Key': key}} for key in unique_keys(keys)], on_written)
+
+    def _send(self, requests, on_written):
+        if on_written is None:
+            self._write_requests(requests)
+        else:
+            self._write_each(requests, on_written)
+
+    # Une requête à la fois : plus d'appels qu'un BatchWriteItem pour la même capacité consommée, mais chacun
+    # renvoie la version remplacée. Un film supprimé qui n'existait plus n'est pas compté.
+    def _write_each(self, requests, on_written):
+        for request in requests:
+            if 'PutRequest' in request:
+                new = request['PutRequest']['Item']
+                write, params = self.client.put_item, {'Item': new}
+            else:
+                new = None
+                write, params = self.client.delete_item, {'Key': request['DeleteRequest']['Key']}
+            attempt = 0
+            while True:
+                try:
+                    response = write(TableName=self.table_name, ReturnValues='ALL_OLD',
+                                     ReturnConsumedCapacity='TOTAL', **params)
+                    break
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in THROTTLING_ERRORS or attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    self._backoff(attempt)
+            old = response.get('Attributes')
+            with self._lock:
+                if old is not None or new is not None:
+                    self.items_written += 1
+                self.consumed_wcu += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            on_written(old, new)
+
+    # Envoie un lot de requêtes d'écriture en reprenant les `UnprocessedItems` jusqu'à épuisement
+    def _write_requests(self, requests):
+        request_items = {self.table_name: requests}
+        attempt = 0
+        while request_items:
+            pending = sum(len(requests) for requests in request_items.values())
+            try:
+                response = self.client.batch_write_item(
+                    RequestItems=request_items,
+                    ReturnConsumedCapacity='TOTAL'
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLING_ERRORS or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._backoff(attempt)
+                continue
+
+            consumed = sum(c.get('CapacityUnits', 0) for c in response.get('ConsumedCapacity', []))
+            request_items = response.get('UnprocessedItems') or {}
+            unprocessed = sum(len(requests) for requests in request_items.values())
+            with self._lock:
+                self.items_written += pending - unprocessed
+                self.consumed_wcu += consumed
+            if request_items:
+                if attempt >= self.max_retries:
+                    raise RuntimeError(f"{unprocessed} items non traités après {attempt} tentatives")
+                attempt += 1
+                self._backoff(attempt)
+
+    def load(self, movies, progress=None, on_written=None):
+        return self.write((movie_to_item(movie) for movie in movies), progress, on_written)
+
+    # Écriture en masse d'items déjà au format de la table
+    def write(self, items, progress=None, on_written=None):
+        return self._run(lambda chunk: self.write_batch(chunk, on_written), items, progress)
+
+    # Suppression en masse d'un flux de clés ; progress(nombre d'items supprimés) est appelé au fil des lots
+    def delete(self, keys, progress=None, on_written=None):
+        return self._run(lambda chunk: self.delete_batch(chunk, on_written), keys, progress)
+
+    def _run(self, send_batch, items, progress):
+        start = time.perf_counter()
+        in_flight = set()
+
+        def report(done):
+            for future in done:
+                future.result()
+            if progress is not None and done:
+                progress(self.items_written)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk in chunked_items(items):
+                # Nombre de lots en vol borné : la mémoire ne dépend pas de la taille du flux
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    report(done)
+                in_flight.add(executor.submit(bind_operation(send_batch), chunk))
+            report(in_flight)
+        seconds = time.perf_counter() - start
+        return {
+            'items': self.items_written,
+            'seconds': seconds,
+            'items_per_second': self.items_written / seconds if seconds else 0.0,
+            'consumed_wcu': self.consumed_wcu,
+            'retries': self.retries
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement massif de films (JSONL ou CSV) dans DynamoDB")
+    parser.add_argument('path', help="Fichier .jsonl ou .csv contenant les films")
+    parser.add_argument('--table', default=TABLE_NAME)
+    parser.add_argument('--profile', default=PROFILE_NAME)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--max-wcu', type=float, default=None,
+                        help="Active le limiteur adaptatif, plafonné à ce débit d'écriture")
+    parser.add_argument('--skip-stats', action='store_true',
+                        help="Envoie des BatchWriteItem sans tenir les agrégats, à reconstruire ensuite avec "
+                             "rebuild_stats.py sur une table calme")
+    parser.add_argument('--log-format', choices=['console', 'json', 'quiet'], default='console')
+    args = parser.parse_args()
+    configure_logging(args.log_format)
+
+    # Client dédié quand le limiteur y attache ses hooks, partagé sinon
+    client = get_resource('dynamodb', args.profile, shared=not args.max_wcu).meta.client
+    if args.max_wcu:
+        AdaptiveRateLimiter(initial_rate=args.max_wcu / 2, max_rate=args.max_wcu).attach(client)
+    logger.info("Chargement de %s dans la table %s avec %s workers...", args.path, args.table, args.workers)
+    # Agrégats tenus au fil des écritures (un PutItem par film) quand leur table existe
+    db = DynamoDB(table_name=args.table, profile_name=args.profile, maintain_stats=not args.skip_stats)
+    with db.stats_collector() as on_written:
+        stats = BulkLoader(client, args.table, max_workers=args.workers).load(read_movies(args.path),
+                                                                               on_written=on_written)
+    logger.info("%s films insérés en %.1fs (%.0f items/s, %.0f WCU consommées, %s reprises)",
+                stats['items'], stats['seconds'], stats['items_per_second'], stats['consumed_wcu'], stats['retries'],
+                extra=SUCCESS)
+    if args.skip_stats:
+        logger.warning("Agrégats non mis à jour : lancer rebuild_stats.py une fois la table calme")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+# Valeur renvoyée par `get` quand la clé est absente ou expirée (None peut être une valeur en cache)
+MISS = object()
+
+
+# Normalise les nombres pour que 8.5, '8.5' et Decimal('8.5') partagent la même entrée
+def _normalize(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    return value
+
+
+class ItemCache:
+    def __init__(self, max_size=1024, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clé -> (expiration, valeur), du moins au plus récemment utilisé
+        self._lock = threading.Lock()
+        # Toute écriture incrémente la génération, ce qui rend les anciennes requêtes inaccessibles
+        # et empêche une lecture commencée avant l'écriture de remettre en cache une valeur périmée
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def movie_key(movie_id, release_year):
+        return 'item', movie_id, _normalize(release_year)
+
+    def query_key(self, index_name, *args):
+        return 'query', self._generation, index_name, tuple(_normalize(arg) for arg in args)
+
+    # À relever avant la lecture en base et à passer à `set`
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    # generation : si une écriture a eu lieu depuis, la valeur lue peut être périmée et n'est pas mise en cache
+    def set(self, key, value, ttl=None, generation=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Invalide le film et toutes les requêtes : une écriture peut changer n'importe quel résultat d'index
+    def invalidate_movie(self, movie_id, release_year):
+        with self._lock:
+            self._entries.pop(self.movie_key(movie_id, release_year), None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from boto3.session import Session
+from botocore.config import Config
+
+# Réglages réseau par défaut des clients AWS et de la session HTTP partagée
+MAX_POOL_CONNECTIONS = 64  # connexions gardées ouvertes par client : doit couvrir le nombre de workers
+CONNECT_TIMEOUT = 5  # secondes
+READ_TIMEOUT = 60  # secondes
+TCP_KEEPALIVE = True  # sondes TCP sur les connexions inactives du pool
+RETRY_MODE = 'standard'  # 'adaptive' ajoute une limitation de débit côté client après un throttling
+MAX_ATTEMPTS = 10  # appel initial compris
+
+# Sessions et clients partagés, par profil/région (et service/point d'accès/réglages pour les clients).
+# Une session boto3 n'est pas thread-safe pendant la création des clients : elle se fait sous verrou,
+# les clients obtenus le sont.
+_lock = threading.Lock()
+_sessions = {}
+_clients = {}
+_resources = {}
+_http_sessions = {}
+
+
+def _reset_after_fork():
+    # Les pools de connexions hérités du parent ne doivent pas être réutilisés par un processus fils
+    global _lock
+    _lock = threading.Lock()
+    _sessions.clear()
+    _clients.clear()
+    _resources.clear()
+    _http_sessions.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def client_config(max_pool_connections=MAX_POOL_CONNECTIONS, connect_timeout=CONNECT_TIMEOUT,
+                  read_timeout=READ_TIMEOUT, tcp_keepalive=TCP_KEEPALIVE, retry_mode=RETRY_MODE,
+                  max_attempts=MAX_ATTEMPTS):
+    return Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        tcp_keepalive=tcp_keepalive,
+        retries={'mode': retry_mode, 'total_max_attempts': max_attempts}
+    )
+
+
+def get_session(profile_name=None, region_name=None):
+    key = (profile_name, region_name)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = Session(profile_name=profile_name, region_name=region_name)
+        return session
+
+
+# Client bas niveau. shared=False crée un client dédié (non mis en cache), à utiliser quand on y attache
+# des hooks d'événements propres à un appelant (limiteur de débit, métriques).
+# settings : arguments de `client_config` (taille du pool, timeouts, keep-alive, mode de reprise)
+def get_client(service_name, profile_name=None, region_name=None, endpoint_url=None, shared=True, **settings):
+    session = get_session(profile_name, region_name)
+    key = (service_name, profile_name, region_name, endpoint_url, tuple(sorted(settings.items())))
+    with _lock:
+        client = _clients.get(key) if shared else None
+        if client is None:
+            client = session.client(service_name, endpoint_url=endpoint_url, config=client_config(**settings))
+            if shared:
+                _clients[key] = client
+        return client
+
+
+# Ressource boto3 (son client, `resource.meta.client`, accepte et renvoie des types Python), mêmes règles.
+# Chaque appel renvoie une nouvelle ressource (objets `Table` propres à l'appelant) sur un client partagé, distinct
+# de celui de `get_client`. La couche de transformation enregistrée sur ce client traduit les conditions `Key`/`Attr`
+# avec un constructeur commun à tous ses utilisateurs : entre threads, passer des expressions déjà construites
+# (`rawcodec.build_expressions`).
+def get_resource(service_name, profile_name=None, region_name=None, endpoint_url=None, shared=True, **settings):
+    session = get_session(profile_name, region_name)
+    key = (service_name, profile_name, region_name, endpoint_url, tuple(sorted(settings.items())))
+    with _lock:
+        template = _resources.get(key) if shared else None
+        if template is None:
+            template = session.resource(service_name, endpoint_url=endpoint_url, config=client_config(**settings))
+            if not shared:
+                return template
+            _resources[key] = template
+        return type(template)(client=template.meta.client)
+
+
+# Session HTTP avec pool de connexions : les poignées TLS sont réutilisées d'une requête à l'autre.
+# La session partagée (par taille de pool) sert aux téléchargements isolés, shared=False aux copies en lot.
+def get_http_session(pool_size=MAX_POOL_CONNECTIONS, shared=True):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        http = _http_sessions.get(pool_size) if shared else None
+        if http is None:
+            http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            http.mount('http://', adapter)
+            http.mount('https://', adapter)
+            if shared:
+                _http_sessions[pool_size] = http
+        return http
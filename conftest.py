@@ -0,0 +1,19 @@
+import pytest
+from moto import mock_aws
+
+
+# Identifiants et région factices pour le profil `dev`, services AWS simulés par moto
+@pytest.fixture
+def aws_environment(tmp_path, monkeypatch):
+    credentials = tmp_path / 'credentials'
+    config = tmp_path / 'config'
+    credentials.write_text("[default]\naws_access_key_id = testing\naws_secret_access_key = testing\n"
+                           "[dev]\naws_access_key_id = testing\naws_secret_access_key = testing\n")
+    config.write_text("[default]\nregion = eu-west-1\n[profile dev]\nregion = eu-west-1\n")
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(credentials))
+    monkeypatch.setenv('AWS_CONFIG_FILE', str(config))
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-1')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN', 'AWS_PROFILE'):
+        monkeypatch.delenv(name, raising=False)
+    with mock_aws():
+        yield
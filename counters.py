@@ -0,0 +1,135 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre d'agrégation par défaut : au plus une écriture par compteur et par seconde
+FLUSH_INTERVAL = 1.0
+# Nombre de compteurs distincts en attente qui déclenche un vidage anticipé
+MAX_PENDING = 1000
+# Écritures de compteurs menées en parallèle pendant un vidage
+FLUSH_WORKERS = 8
+PERMANENT_ERRORS = ('ConditionalCheckFailedException', 'ValidationException')
+
+
+class CounterBuffer:
+    # Agrège en mémoire les incréments par (movie_id, release_year, attribut) et les écrit en une seule mise à jour
+    # fusionnée par compteur, à chaque fenêtre `flush_interval`, dès `max_pending` compteurs, et à l'arrêt.
+    # attribut : attribut de premier niveau (ex. 'views') ou chemin imbriqué (ex. 'details.sequels'),
+    # voir `DynamoDB.apply_counter_delta`.
+    def __init__(self, db, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, max_workers=FLUSH_WORKERS):
+        self._db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self._pending = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.increments = 0
+        self.writes = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name='counter-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def increment(self, movie_id, release_year, attribute, delta=1):
+        if isinstance(delta, float):
+            delta = Decimal(str(delta))
+        key = (movie_id, release_year, attribute)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("CounterBuffer fermé")
+            self._pending[key] = self._pending.get(key, 0) + delta
+            self.increments += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    # Deltas pas encore écrits (en attente ou en cours d'écriture), à ajouter à la valeur lue dans la table
+    def pending(self):
+        with self._lock:
+            deltas = dict(self._in_flight)
+            for key, delta in self._pending.items():
+                deltas[key] = deltas.get(key, 0) + delta
+        return deltas
+
+    def pending_delta(self, movie_id, release_year, attribute):
+        key = (movie_id, release_year, attribute)
+        with self._lock:
+            return self._in_flight.get(key, 0) + self._pending.get(key, 0)
+
+    # Écrit tous les deltas en attente ; ceux dont l'écriture échoue sont remis en attente
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = {key: delta for key, delta in batch.items() if delta}
+                keys = list(self._in_flight)
+            if not keys:
+                return 0
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as executor:
+                return sum(executor.map(self._write, keys))
+
+    # Écrit un compteur et le retire aussitôt des deltas en cours : `pending()` ne le compte jamais
+    # en plus de la valeur déjà écrite dans la table
+    def _write(self, key):
+        delta = self._in_flight[key]
+        try:
+            self._db.apply_counter_delta(*key, delta)
+        except Exception as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if code in PERMANENT_ERRORS:
+                # Film absent ou attribut non numérique : réessayer ne servirait à rien
+                logger.error("Compteur %s abandonné (delta %s): %s", key, delta, e)
+                with self._lock:
+                    del self._in_flight[key]
+                return 0
+            logger.error("Erreur lors de l'écriture du compteur %s: %s", key, e)
+            with self._lock:
+                del self._in_flight[key]
+                self._pending[key] = self._pending.get(key, 0) + delta
+                self.failures += 1
+            return 0
+        with self._lock:
+            del self._in_flight[key]
+            self.writes += 1
+        return 1
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._closed:
+                self.flush()
+
+    # Arrête le thread de vidage et écrit les derniers deltas (appelé aussi à la sortie du programme)
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'increments': self.increments,
+                'writes': self.writes,
+                'failures': self.failures,
+                'pending': len(self._pending)
+            }
@@ -0,0 +1,94 @@
+import json
+
+# Nombre de films par record batch : borne la mémoire de l'export
+BATCH_SIZE = 10000
+
+
+# pyarrow est une dépendance optionnelle, importée seulement au moment de l'export
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow est requis pour l'export Arrow/Parquet/Feather (pip install pyarrow)") from e
+    return pyarrow
+
+
+# Schéma fixe d'un film, `details` aplati en colonnes
+def movie_schema():
+    pa = _pyarrow()
+    return pa.schema([
+        ('movie_id', pa.string()),
+        ('title', pa.string()),
+        ('release_year', pa.int32()),
+        ('genre', pa.string()),
+        ('rating', pa.float64()),
+        ('director', pa.string()),
+        ('duration', pa.int32()),
+        ('sequels', pa.int32()),
+        ('awards', pa.string()),  # objet libre, sérialisé en JSON
+        ('reviews', pa.list_(pa.struct([('reviewer', pa.string()), ('comment', pa.string())])))
+    ])
+
+
+def _int(value):
+    return int(value) if value is not None else None
+
+
+def _columns(items):
+    columns = {name: [] for name in ('movie_id', 'title', 'release_year', 'genre', 'rating', 'director', 'duration',
+                                     'sequels', 'awards', 'reviews')}
+    for item in items:
+        details = item.get('details') or {}
+        rating = item.get('rating')
+        awards = details.get('awards')
+        reviews = details.get('reviews')
+        columns['movie_id'].append(item.get('movie_id'))
+        columns['title'].append(item.get('title'))
+        columns['release_year'].append(_int(item.get('release_year')))
+        columns['genre'].append(item.get('genre'))
+        columns['rating'].append(float(rating) if rating is not None else None)
+        columns['director'].append(details.get('director'))
+        columns['duration'].append(_int(details.get('duration')))
+        columns['sequels'].append(_int(details.get('sequels')))
+        columns['awards'].append(json.dumps(awards, default=str) if awards is not None else None)
+        columns['reviews'].append([{'reviewer': review.get('reviewer'), 'comment': review.get('comment')}
+                                   for review in reviews] if reviews is not None else None)
+    return columns
+
+
+# Convertit un flux d'items en record batches de `batch_size` films au plus
+def record_batches(items, batch_size=BATCH_SIZE):
+    pa = _pyarrow()
+    schema = movie_schema()
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield pa.RecordBatch.from_pydict(_columns(batch), schema=schema)
+            batch = []
+    if batch:
+        yield pa.RecordBatch.from_pydict(_columns(batch), schema=schema)
+
+
+# Écrit les films en flux dans un fichier Parquet ou Feather (format déduit de l'extension par défaut),
+# renvoie le nombre de films exportés
+def write_movies(items, path, file_format=None, batch_size=BATCH_SIZE):
+    pa = _pyarrow()
+    file_format = file_format or ('feather' if path.endswith(('.feather', '.arrow')) else 'parquet')
+    schema = movie_schema()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema)
+    elif file_format == 'feather':
+        # Feather v2 est le format de fichier IPC d'Arrow
+        writer = pa.ipc.new_file(path, schema)
+    else:
+        raise ValueError(f"Format d'export inconnu: {file_format}")
+    rows = 0
+    try:
+        for batch in record_batches(items, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
@@ -0,0 +1,79 @@
+import json
+import logging
+import sys
+
+# Marqueur des messages de succès (affichés en vert sur la console)
+SUCCESS = {'success': True}
+
+# Bibliothèques tierces très bavardes en DEBUG, maintenues au moins au niveau WARNING
+THIRD_PARTY_LOGGERS = ('boto3', 'botocore', 'aiobotocore', 's3transfer', 'urllib3')
+
+# Les corps d'items ne sont rendus que si ce réglage est actif (voir `configure_logging`)
+_render_item_bodies = True
+
+
+class _Body:
+    # Corps d'item rendu paresseusement : rien n'est converti en texte si le message n'est pas émis
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(self.value) if _render_item_bodies else '<item masqué>'
+
+
+def body(value):
+    return _Body(value)
+
+
+# Journalise chaque item au niveau DEBUG, sans aucun coût si ce niveau est désactivé
+def log_items(logger, items):
+    if _render_item_bodies and logger.isEnabledFor(logging.DEBUG):
+        for item in items:
+            logger.debug('%s', item)
+
+
+class ColorFormatter(logging.Formatter):
+    # Reproduit l'affichage coloré historique des exercices
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno >= logging.ERROR:
+            return f"\033[91m{message}\033[0m"
+        if getattr(record, 'success', False):
+            return f"\033[92m{message}\033[0m"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    # Une ligne JSON par message, pour l'agrégation de logs
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'success', False):
+            entry['success'] = True
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# Mode bibliothèque par défaut : aucun handler, rien n'est écrit sur stdout
+def configure_logging(mode='console', level=logging.INFO, item_bodies=True, stream=None):
+    global _render_item_bodies
+    _render_item_bodies = item_bodies
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if mode == 'quiet':
+        root.addHandler(logging.NullHandler())
+        return
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if mode == 'json' else ColorFormatter('%(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in THIRD_PARTY_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
@@ -0,0 +1,189 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from ratelimit import READ_OPERATIONS, WRITE_OPERATIONS
+
+# Bornes (secondes) des buckets de l'histogramme de latence exporté au format Prometheus
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DATA_OPERATIONS = READ_OPERATIONS | WRITE_OPERATIONS
+# Nombre d'échantillons récents conservés pour les percentiles de l'API en processus
+RESERVOIR_SIZE = 2048
+
+# Opération `DynamoDB` en cours, à laquelle sont attribués les appels AWS
+_current_operation = contextvars.ContextVar('dynamodb_operation', default=None)
+
+
+# Propage l'opération courante dans une fonction exécutée par un pool de threads
+def bind_operation(fn):
+    operation = _current_operation.get()
+
+    def wrapper(*args, **kwargs):
+        token = _current_operation.set(operation)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_operation.reset(token)
+    return wrapper
+
+
+# Percentile par rang le plus proche d'une liste déjà triée (0.0 si vide)
+def percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.latency_sum = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = deque(maxlen=RESERVOIR_SIZE)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.items = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.consumed_capacity = 0.0
+
+    def observe(self, latency):
+        self.calls += 1
+        self.latency_sum += latency
+        self.samples.append(latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def snapshot(self):
+        samples = sorted(self.samples)
+        return {
+            'calls': self.calls,
+            'latency_p50': percentile(samples, 50),
+            'latency_p95': percentile(samples, 95),
+            'latency_p99': percentile(samples, 99),
+            'latency_sum': self.latency_sum,
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'items': self.items,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'consumed_capacity': self.consumed_capacity
+        }
+
+
+class Metrics:
+    # Collecteur par défaut ; tout objet exposant `operation`, `attach` et `snapshot` peut le remplacer
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get(self, operation):
+        stats = self._stats.get(operation)
+        if stats is None:
+            stats = self._stats[operation] = OperationStats()
+        return stats
+
+    # Mesure la durée d'une méthode et lui attribue les appels AWS qu'elle déclenche. Une méthode appelée par
+    # une autre (ex. `delete_movies` depuis `delete_movies_by_genre`) mesure sa durée, mais ses appels AWS
+    # restent attribués à l'opération la plus externe.
+    @contextmanager
+    def operation(self, name):
+        token = _current_operation.set(_current_operation.get() or name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            latency = time.perf_counter() - start
+            _current_operation.reset(token)
+            with self._lock:
+                self._get(name).observe(latency)
+
+    def attach(self, client):
+        client.meta.events.register('provide-client-params.dynamodb', self._prepare_params)
+        client.meta.events.register('before-send.dynamodb', self._before_send)
+        client.meta.events.register('after-call.dynamodb', self._after_call)
+        return client
+
+    def _prepare_params(self, params, model, context, **kwargs):
+        if model.name in DATA_OPERATIONS:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        # Les réponses d'écriture ne contiennent pas d'items : on compte ceux de la requête
+        if model.name == 'BatchWriteItem':
+            context['written_items'] = sum(len(requests) for requests in params.get('RequestItems', {}).values())
+        elif model.name == 'TransactWriteItems':
+            context['written_items'] = len(params.get('TransactItems', []))
+        elif model.name in ('PutItem', 'UpdateItem', 'DeleteItem'):
+            context['written_items'] = 1
+
+    def _before_send(self, request, **kwargs):
+        body = request.body or b''
+        with self._lock:
+            self._get(_current_operation.get() or 'other').bytes_sent += len(body)
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        items = parsed.get('Count', context.get('written_items'))
+        if items is None:
+            if 'Item' in parsed:
+                items = 1
+            elif isinstance(parsed.get('Responses'), list):
+                items = len(parsed['Responses'])  # TransactGetItems
+            elif 'Responses' in parsed:
+                items = sum(len(responses) for responses in parsed['Responses'].values())
+            else:
+                items = 0
+        capacities = parsed.get('ConsumedCapacity', [])
+        consumed = sum(capacity.get('CapacityUnits', 0)
+                       for capacity in (capacities if isinstance(capacities, list) else [capacities]))
+        with self._lock:
+            stats = self._get(_current_operation.get() or 'other')
+            stats.requests += 1
+            stats.errors += 1 if http_response.status_code >= 400 else 0
+            stats.retries += parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            stats.items += items
+            stats.bytes_received += len(http_response.content or b'')
+            stats.consumed_capacity += float(consumed)
+
+    def snapshot(self):
+        with self._lock:
+            return {operation: stats.snapshot() for operation, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # Export texte au format d'exposition Prometheus
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            stats_by_operation = sorted(self._stats.items())
+            lines.append('# TYPE dynamodb_operation_latency_seconds histogram')
+            for operation, stats in stats_by_operation:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'dynamodb_operation_latency_seconds_bucket{{operation="{operation}",le="{bound}"}} '
+                                 f'{cumulative}')
+                lines.append(f'dynamodb_operation_latency_seconds_sum{{operation="{operation}"}} {stats.latency_sum}')
+                lines.append(f'dynamodb_operation_latency_seconds_count{{operation="{operation}"}} {stats.calls}')
+            for metric, attribute in (('dynamodb_requests_total', 'requests'),
+                                      ('dynamodb_errors_total', 'errors'),
+                                      ('dynamodb_retries_total', 'retries'),
+                                      ('dynamodb_items_total', 'items'),
+                                      ('dynamodb_consumed_capacity_units_total', 'consumed_capacity')):
+                lines.append(f'# TYPE {metric} counter')
+                for operation, stats in stats_by_operation:
+                    lines.append(f'{metric}{{operation="{operation}"}} {getattr(stats, attribute)}')
+            lines.append('# TYPE dynamodb_bytes_total counter')
+            for operation, stats in stats_by_operation:
+                lines.append(f'dynamodb_bytes_total{{operation="{operation}",direction="sent"}} {stats.bytes_sent}')
+                lines.append(f'dynamodb_bytes_total{{operation="{operation}",direction="received"}} '
+                             f'{stats.bytes_received}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,56 @@
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+from metrics import bind_operation
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class ResultPage(list):
+    # Page de résultats : une liste d'items, plus le curseur de la page suivante (None sur la dernière page)
+    def __init__(self, items=(), next_cursor=None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _fingerprint(operation, args):
+    return [operation, [str(arg) for arg in args]]
+
+
+# Curseur opaque et sérialisable (texte URL-safe) : `ExclusiveStartKey` au format typé DynamoDB,
+# lié à la requête qui l'a produit pour qu'il ne soit pas rejoué sur une autre
+def encode_cursor(operation, args, last_key):
+    if not last_key:
+        return None
+    payload = {
+        'q': _fingerprint(operation, args),
+        'k': {name: _serializer.serialize(value) for name, value in last_key.items()}
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(operation, args, cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        key = {name: _deserializer.deserialize(value) for name, value in payload['k'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Curseur invalide: {cursor!r}") from e
+    if payload.get('q') != _fingerprint(operation, args):
+        raise ValueError("Le curseur a été produit par une autre requête")
+    return key
+
+
+# Parcourt les pages en chargeant la suivante pendant que l'appelant traite la courante ;
+# fetch_page(cursor) renvoie une `ResultPage`
+def prefetch_pages(fetch_page, cursor=None):
+    fetch_page = bind_operation(fetch_page)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch_page, cursor)
+        while future is not None:
+            page = future.result()
+            future = executor.submit(fetch_page, page.next_cursor) if page.next_cursor else None
+            yield page
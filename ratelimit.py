@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+
+# Opérations de données acceptant `ReturnConsumedCapacity`
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+WRITE_OPERATIONS = {'PutItem', 'UpdateItem', 'DeleteItem', 'BatchWriteItem', 'TransactWriteItems'}
+THROTTLING_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+# Intervalle minimal entre deux augmentations additives du débit (secondes)
+INCREASE_INTERVAL = 1.0
+
+
+# Backoff exponentiel avec jitter complet : délai aléatoire entre 0 et base * 2^attempt, plafonné à `cap`
+def backoff_delay(attempt, base=0.05, cap=5.0):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    # Seau de jetons en unités de capacité : débité a priori d'une estimation, puis ajusté avec la consommation réelle
+    def __init__(self, rate, min_rate=1.0, max_rate=None, increase=1.0, decrease=0.5):
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = self.rate
+        self.estimate = 1.0  # coût moyen observé d'une requête
+        self.throttles = 0
+        self._updated = time.monotonic()
+        self._last_adjustment = self._updated
+        self._limited = False
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        # Réserve plafonnée à une seconde de débit
+        self.tokens = min(self.rate, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Temps d'attente avant de pouvoir envoyer une requête (0 si des jetons sont disponibles)
+    def wait_time(self):
+        with self._lock:
+            self._refill()
+            if self.tokens > 0:
+                return 0.0
+            self._limited = True
+            return -self.tokens / self.rate + 0.001
+
+    def take(self):
+        with self._lock:
+            self.tokens -= self.estimate
+            return self.estimate
+
+    def settle(self, reserved, consumed):
+        with self._lock:
+            self.tokens -= consumed - reserved
+            self.estimate = 0.8 * self.estimate + 0.2 * consumed if consumed else self.estimate
+
+    # AIMD : augmentation additive tant que le seau limite le client sans throttling...
+    def on_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._limited and now - self._last_adjustment >= INCREASE_INTERVAL:
+                self.rate = self.rate + self.increase
+                if self.max_rate is not None:
+                    self.rate = min(self.rate, self.max_rate)
+                self._limited = False
+                self._last_adjustment = now
+
+    # ...et diminution multiplicative à chaque réponse throttlée
+    def on_throttle(self):
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            self._last_adjustment = time.monotonic()
+
+
+class AdaptiveRateLimiter:
+    # Un seau par (table, index, lecture/écriture), branché sur les événements botocore du client DynamoDB
+    def __init__(self, initial_rate=5.0, min_rate=1.0, max_rate=None, increase=1.0, decrease=0.5):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        client.meta.events.register('provide-client-params.dynamodb', self._before_call)
+        client.meta.events.register('needs-retry.dynamodb', self._on_attempt)
+        client.meta.events.register('after-call.dynamodb', self._after_call)
+        return client
+
+    def bucket(self, table_name, index_name, kind):
+        key = (table_name, index_name, kind)
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.initial_rate, self.min_rate, self.max_rate, self.increase,
+                                                 self.decrease)
+            return self._buckets[key]
+
+    def rates(self):
+        with self._lock:
+            return {key: bucket.rate for key, bucket in self._buckets.items()}
+
+    def _write_buckets(self, table_name):
+        # Une écriture consomme aussi la capacité de chaque GSI déjà observé sur la table
+        with self._lock:
+            indexes = [key[1] for key in self._buckets if key[0] == table_name and key[1] and key[2] == 'write']
+        return [self.bucket(table_name, None, 'write')] + [self.bucket(table_name, index, 'write')
+                                                           for index in indexes]
+
+    def _before_call(self, params, model, context, **kwargs):
+        if model.name not in READ_OPERATIONS and model.name not in WRITE_OPERATIONS:
+            return
+        params['ReturnConsumedCapacity'] = 'INDEXES'
+        kind = 'read' if model.name in READ_OPERATIONS else 'write'
+        if 'RequestItems' in params:
+            tables = list(params['RequestItems'])
+        elif 'TransactItems' in params:
+            tables = list({action['TableName'] for item in params['TransactItems'] for action in item.values()})
+        else:
+            tables = [params['TableName']]
+        buckets = []
+        for table_name in tables:
+            if kind == 'read':
+                buckets.append(self.bucket(table_name, params.get('IndexName'), 'read'))
+            else:
+                buckets.extend(self._write_buckets(table_name))
+
+        while True:
+            delay = max(bucket.wait_time() for bucket in buckets)
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        context['rate_limit'] = (kind, [(bucket, bucket.take()) for bucket in buckets])
+
+    def _on_attempt(self, response=None, request_dict=None, **kwargs):
+        if response is None or request_dict is None:
+            return None
+        state = request_dict.get('context', {}).get('rate_limit')
+        code = response[1].get('Error', {}).get('Code')
+        if state and code in THROTTLING_ERRORS:
+            for bucket, _ in state[1]:
+                bucket.on_throttle()
+        return None  # La décision de réessayer reste au gestionnaire de retries de botocore
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        state = context.get('rate_limit')
+        if not state:
+            return
+        kind, reserved = state
+        consumed = {}
+        capacities = parsed.get('ConsumedCapacity', [])
+        for capacity in capacities if isinstance(capacities, list) else [capacities]:
+            table_name = capacity.get('TableName')
+            table_units = capacity.get('Table', {}).get('CapacityUnits', capacity.get('CapacityUnits', 0))
+            consumed[(table_name, None)] = table_units
+            for index_name, index_capacity in capacity.get('GlobalSecondaryIndexes', {}).items():
+                consumed[(table_name, index_name)] = index_capacity.get('CapacityUnits', 0)
+
+        reserved_buckets = {id(bucket): units for bucket, units in reserved}
+        for (table_name, index_name), units in consumed.items():
+            bucket = self.bucket(table_name, index_name, kind)
+            bucket.settle(reserved_buckets.pop(id(bucket), 0.0), units)
+        for bucket, units in reserved:
+            if id(bucket) in reserved_buckets:
+                bucket.settle(units, 0.0)
+
+        # Des items ou clés non traités signalent un throttling partiel des opérations par lot
+        throttled = http_response.status_code >= 400 or parsed.get('UnprocessedItems') or parsed.get(
+            'UnprocessedKeys')
+        for bucket, _ in reserved:
+            if throttled:
+                if http_response.status_code < 400:
+                    bucket.on_throttle()
+            else:
+                bucket.on_success()
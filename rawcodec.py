@@ -0,0 +1,162 @@
+import math
+from array import array
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeSerializer
+
+
+# Nombre DynamoDB en int quand c'est un entier, sinon en float
+def native_number(value):
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    return int(value)
+
+
+class FastDeserializer:
+    # Décodage des valeurs typées du client bas niveau, sans la validation ni les conversions de `TypeDeserializer`.
+    # Avec native_numbers, les N deviennent int/float au lieu de Decimal (précision limitée à celle d'un float).
+    def __init__(self, native_numbers=False):
+        number = native_number if native_numbers else Decimal
+        self._number = number
+        self._decoders = {
+            'S': str,
+            'N': number,
+            'B': bytes,
+            'BOOL': bool,
+            'NULL': lambda value: None,
+            'M': self.item,
+            'L': lambda values: [self.value(value) for value in values],
+            'SS': set,
+            'NS': lambda values: {number(value) for value in values},
+            'BS': set
+        }
+
+    def value(self, attribute_value):
+        # Raccourcis pour les types les plus fréquents
+        if 'S' in attribute_value:
+            return attribute_value['S']
+        if 'N' in attribute_value:
+            return self._number(attribute_value['N'])
+        (kind, value), = attribute_value.items()
+        return self._decoders[kind](value)
+
+    def item(self, item):
+        value = self.value
+        return {name: value(attribute_value) for name, attribute_value in item.items()}
+
+    # Décode une page entière d'un coup
+    def items(self, items):
+        value = self.value
+        return [{name: value(attribute_value) for name, attribute_value in item.items()} for item in items]
+
+
+class MovieRecord:
+    # Film typé et compact : pas de dict par instance
+    __slots__ = ('movie_id', 'title', 'release_year', 'genre', 'rating', 'director', 'duration', 'details')
+
+    def __init__(self, movie_id, title, release_year, genre, rating, director=None, duration=None, details=None):
+        self.movie_id = movie_id
+        self.title = title
+        self.release_year = release_year
+        self.genre = genre
+        self.rating = rating
+        self.director = director
+        self.duration = duration
+        self.details = details
+
+    @classmethod
+    def from_item(cls, item):
+        details = item.get('details') or {}
+        return cls(item.get('movie_id'), item.get('title'), item.get('release_year'), item.get('genre'),
+                   item.get('rating'), item.get('director', details.get('director')),
+                   item.get('duration', details.get('duration')), details)
+
+    def __repr__(self):
+        return f"MovieRecord(movie_id={self.movie_id!r}, title={self.title!r}, release_year={self.release_year!r})"
+
+
+class MovieColumns:
+    # Résultats en colonnes : tableaux `array` pour les nombres (NaN si absent), listes pour le texte
+    def __init__(self):
+        self.movie_id = []
+        self.title = []
+        self.genre = []
+        self.director = []
+        self.release_year = array('q')
+        self.rating = array('d')
+        self.duration = array('d')
+
+    def __len__(self):
+        return len(self.movie_id)
+
+    def extend(self, items):
+        for item in items:
+            details = item.get('details') or {}
+            rating = item.get('rating')
+            duration = item.get('duration', details.get('duration'))
+            self.movie_id.append(item.get('movie_id'))
+            self.title.append(item.get('title'))
+            self.genre.append(item.get('genre'))
+            self.director.append(item.get('director', details.get('director')))
+            self.release_year.append(int(item['release_year']))
+            self.rating.append(float(rating) if rating is not None else math.nan)
+            self.duration.append(float(duration) if duration is not None else math.nan)
+
+    def as_dict(self):
+        return {name: getattr(self, name)
+                for name in ('movie_id', 'title', 'release_year', 'genre', 'rating', 'director', 'duration')}
+
+
+# Traduit les conditions `Key`/`Attr` en chaînes d'expression et marqueurs (valeurs Python, non typées), avec un
+# constructeur propre à l'appel : celui que la ressource boto3 enregistre sur son client est commun à tous les
+# threads qui partagent ce client, et remis à zéro à chaque requête.
+def build_expressions(kwargs):
+    params = dict(kwargs)
+    builder = ConditionExpressionBuilder()
+    names = dict(params.pop('ExpressionAttributeNames', {}))
+    values = dict(params.pop('ExpressionAttributeValues', {}))
+    for param, is_key in (('KeyConditionExpression', True), ('FilterExpression', False),
+                          ('ConditionExpression', False)):
+        condition = params.get(param)
+        if isinstance(condition, ConditionBase):
+            expression = builder.build_expression(condition, is_key_condition=is_key)
+            params[param] = expression.condition_expression
+            names.update(expression.attribute_name_placeholders)
+            values.update(expression.attribute_value_placeholders)
+    if names:
+        params['ExpressionAttributeNames'] = names
+    if values:
+        params['ExpressionAttributeValues'] = values
+    return params
+
+
+class RawTable:
+    # Mêmes appels `scan`/`query` que `Table`, mais via le client bas niveau et `FastDeserializer`.
+    # Les conditions `Key`/`Attr` sont acceptées ; `LastEvaluatedKey` et `ExclusiveStartKey` restent au format
+    # typé bas niveau pour être réutilisés tels quels d'une page à l'autre.
+    def __init__(self, client, table_name, native_numbers=True, records=False):
+        self._client = client
+        self._table_name = table_name
+        self._deserializer = FastDeserializer(native_numbers)
+        self._serializer = TypeSerializer()
+        self._records = records
+
+    def _params(self, kwargs):
+        params = build_expressions(dict(kwargs, TableName=self._table_name))
+        if 'ExpressionAttributeValues' in params:
+            params['ExpressionAttributeValues'] = {name: self._serializer.serialize(value)
+                                                   for name, value in params['ExpressionAttributeValues'].items()}
+        return params
+
+    def _call(self, method, kwargs):
+        response = method(**self._params(kwargs))
+        items = self._deserializer.items(response.get('Items', []))
+        response['Items'] = [MovieRecord.from_item(item) for item in items] if self._records else items
+        return response
+
+    def scan(self, **kwargs):
+        return self._call(self._client.scan, kwargs)
+
+    def query(self, **kwargs):
+        return self._call(self._client.query, kwargs)
@@ -0,0 +1,23 @@
+import argparse
+
+from aws import DynamoDB, PROFILE_NAME, TABLE_NAME
+from logs import configure_logging
+
+
+# Recalcule les agrégats (comptes, notes par genre et par année) depuis un scan de la table des films
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction des agrégats de films depuis un scan")
+    parser.add_argument('--table', default=TABLE_NAME)
+    parser.add_argument('--profile', default=PROFILE_NAME)
+    parser.add_argument('--segments', type=int, default=None, help="Nombre de segments du scan parallèle")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--log-format', choices=['console', 'json', 'quiet'], default='console')
+    args = parser.parse_args()
+    configure_logging(args.log_format)
+
+    db = DynamoDB(table_name=args.table, profile_name=args.profile)
+    db.rebuild_stats(total_segments=args.segments, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,405 @@
-import boto3
+import argparse
+import base64
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import chain
+
 import requests
-from botocore.exceptions import NoCredentialsError
+from botocore.exceptions import ClientError, NoCredentialsError
+
+from clients import CONNECT_TIMEOUT, READ_TIMEOUT, get_client, get_http_session
+from logs import SUCCESS, configure_logging
+from metrics import percentile
+from ratelimit import backoff_delay
+
+logger = logging.getLogger(__name__)
 
 # Nom du profil AWS à utiliser
 PROFILE_NAME = "dev"
+HTTP_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)  # connexion, lecture (secondes)
+# Upload multipart en flux : S3 impose au moins 5 Mo par partie (sauf la dernière) et 10 000 parties
+PART_SIZE = 16 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+# Point d'accès S3 alternatif (MinIO, moto_server...) pour tester sans AWS
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+
 
-# Configuration de Boto3
-session = boto3.Session(profile_name=PROFILE_NAME)
-s3 = session.client('s3')
+# Configuration de Boto3 : client partagé, créé au premier appel (importer le module ne coûte rien)
+def s3_client():
+    return get_client('s3', PROFILE_NAME, endpoint_url=S3_ENDPOINT_URL)
 
 
-def upload_file_to_s3(url, bucket_name, s3_file_name):
+def upload_file_to_s3(url, bucket_name, s3_file_name, stream=False, part_size=PART_SIZE):
     try:
-        # Télécharger le fichier depuis l'URL
-        response = requests.get(url)
+        if stream:
+            # Mode flux : le fichier n'est jamais entièrement chargé en mémoire
+            with get_http_session().get(url, stream=True, timeout=HTTP_TIMEOUT) as response:
+                response.raise_for_status()
+                stream_to_s3(response, bucket_name, s3_file_name, part_size=part_size)
+            logger.info("Fichier téléchargé avec succès de %s vers %s/%s",
+                        url, bucket_name, s3_file_name, extra=SUCCESS)
+            return
+
+        # Télécharger le fichier depuis l'URL (connexions réutilisées d'un appel à l'autre)
+        response = get_http_session().get(url, timeout=HTTP_TIMEOUT)
         response.raise_for_status()  # Vérifie si la requête a réussi
 
         # Envoyer le fichier à S3
-        s3.put_object(Bucket=bucket_name, Key=s3_file_name, Body=response.content)
-        print(f"\033[92mFichier téléchargé avec succès de {url} vers {bucket_name}/{s3_file_name}\033[0m")
+        s3_client().put_object(Bucket=bucket_name, Key=s3_file_name, Body=response.content)
+        logger.info("Fichier téléchargé avec succès de %s vers %s/%s", url, bucket_name, s3_file_name, extra=SUCCESS)
     except requests.exceptions.RequestException as e:
-        print(f"\033[91mErreur lors du téléchargement du fichier depuis l'URL: {e}\033[0m")
+        logger.error("Erreur lors du téléchargement du fichier depuis l'URL: %s", e)
     except NoCredentialsError:
-        print("\033[91mErreur: Identifiants AWS non trouvés\033[0m")
+        logger.error("Erreur: Identifiants AWS non trouvés")
     except Exception as e:
-        print(f"\033[91mErreur lors de l'envoi du fichier à S3: {e}\033[0m")
+        logger.error("Erreur lors de l'envoi du fichier à S3: %s", e)
+
+
+# Regroupe les blocs de la réponse HTTP en parties de `part_size` octets
+def _read_parts(response, part_size):
+    buffer = bytearray()
+    for chunk in response.iter_content(chunk_size=1024 * 1024):
+        buffer.extend(chunk)
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _upload_part(bucket_name, s3_file_name, upload_id, part_number, data):
+    # Somme de contrôle par partie, vérifiée par S3 à la réception
+    checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+    response = s3_client().upload_part(
+        Bucket=bucket_name,
+        Key=s3_file_name,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=data,
+        ChecksumSHA256=checksum
+    )
+    return {'PartNumber': part_number, 'ETag': response['ETag'], 'ChecksumSHA256': checksum}
+
+
+# Envoie une réponse HTTP en flux vers S3 : upload multipart avec au plus `max_workers + 1` parties en mémoire
+def stream_to_s3(response, bucket_name, s3_file_name, part_size=PART_SIZE, max_workers=4):
+    part_size = max(part_size, MIN_PART_SIZE)
+    parts = _read_parts(response, part_size)
+    first_part = next(parts, b'')
+    second_part = next(parts, None)
+    if second_part is None:
+        # Fichier plus petit qu'une partie : un simple PUT coûte moins cher
+        s3_client().put_object(Bucket=bucket_name, Key=s3_file_name, Body=first_part)
+        return len(first_part)
+
+    upload_id = s3_client().create_multipart_upload(
+        Bucket=bucket_name,
+        Key=s3_file_name,
+        ChecksumAlgorithm='SHA256'
+    )['UploadId']
+    slots = threading.Semaphore(max_workers + 1)
+    futures = []
+    size = 0
+
+    def upload(part_number, data):
+        try:
+            return _upload_part(bucket_name, s3_file_name, upload_id, part_number, data)
+        finally:
+            slots.release()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for part_number, data in enumerate(chain([first_part, second_part], parts), start=1):
+            if part_number > MAX_PARTS:
+                raise ValueError(f"Plus de {MAX_PARTS} parties : augmentez part_size")
+            # Attend qu'une place se libère avant de lire la partie suivante
+            slots.acquire()
+            futures.append(executor.submit(upload, part_number, data))
+            size += len(data)
+            failed = [future for future in futures if future.done() and future.exception()]
+            if failed:
+                raise failed[0].exception()
+        uploaded = [future.result() for future in futures]
+        s3_client().complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=s3_file_name,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': uploaded}
+        )
+        return size
+    except BaseException:
+        # Abandon propre : parties en attente annulées, S3 libère les parties déjà envoyées
+        executor.shutdown(wait=True, cancel_futures=True)
+        s3_client().abort_multipart_upload(Bucket=bucket_name, Key=s3_file_name, UploadId=upload_id)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
+# Session HTTP partagée : les connexions (et poignées TLS) sont réutilisées entre les téléchargements
+def create_http_session(pool_size):
+    return get_http_session(pool_size, shared=False)
+
+
+# Lecture d'une liste de paires (url, clé S3), une par ligne, séparées par une tabulation, une virgule ou un espace
+def read_upload_list(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            for separator in ('\t', ',', ' '):
+                if separator in line:
+                    url, key = line.split(separator, 1)
+                    yield url.strip(), key.strip()
+                    break
+
+
+class UploadReport:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.bytes = 0
+        self.failed = 0
+        self.retries = 0
+        self.outcomes = {}
+
+    def record(self, size, latency, outcome='uploaded'):
+        with self._lock:
+            self.bytes += size
+            self.latencies.append(latency)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def summary(self, seconds):
+        latencies = sorted(self.latencies)
+        return {
+            'items': len(latencies),
+            'failed': self.failed,
+            'retries': self.retries,
+            'outcomes': dict(self.outcomes),
+            'bytes': self.bytes,
+            'seconds': seconds,
+            'items_per_second': len(latencies) / seconds if seconds else 0.0,
+            'mb_per_second': self.bytes / 1024 / 1024 / seconds if seconds else 0.0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_p99': percentile(latencies, 99)
+        }
+
+
+# Les erreurs HTTP 4xx (sauf 408 et 429) ne sont pas retentées
+def _is_permanent_error(error):
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return isinstance(error, requests.exceptions.HTTPError) and status is not None and 400 <= status < 500 \
+        and status not in (408, 429)
+
+
+# Index local de déduplication (SQLite) : URL -> ETag/Last-Modified et empreinte du contenu -> clé S3
+class DedupIndex:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "content_hash TEXT, bucket TEXT, s3_key TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects (content_hash TEXT, bucket TEXT, s3_key TEXT, "
+                "PRIMARY KEY (content_hash, bucket))"
+            )
+
+    def get_url(self, url):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, content_hash, bucket, s3_key FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'content_hash', 'bucket', 's3_key'), row))
+
+    def find_object(self, content_hash, bucket_name):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT s3_key FROM objects WHERE content_hash = ? AND bucket = ?", (content_hash, bucket_name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, url, etag, last_modified, content_hash, bucket_name, s3_file_name):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, bucket_name, s3_file_name)
+            )
+            # La clé vient d'être réécrite : elle ne contient plus le contenu d'une autre empreinte
+            self._connection.execute(
+                "DELETE FROM objects WHERE bucket = ? AND s3_key = ?", (bucket_name, s3_file_name)
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?)", (content_hash, bucket_name, s3_file_name)
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+# Empreinte SHA-256 du contenu, gardée dans les métadonnées des objets envoyés avec déduplication
+HASH_METADATA = 'sha256'
+
+
+# Copie côté serveur d'un objet déjà présent dans le bucket. L'index peut être en retard sur le bucket : on vérifie
+# que la source existe encore et contient bien `content_hash` (sinon False, le contenu doit être envoyé), et la
+# copie n'a lieu que si la source n'a pas changé depuis cette vérification.
+def _copy_existing(bucket_name, source_key, s3_file_name, content_hash):
+    try:
+        head = s3_client().head_object(Bucket=bucket_name, Key=source_key)
+        if head.get('Metadata', {}).get(HASH_METADATA) != content_hash:
+            return False
+        if source_key != s3_file_name:
+            s3_client().copy_object(Bucket=bucket_name, Key=s3_file_name, CopySourceIfMatch=head['ETag'],
+                                    CopySource={'Bucket': bucket_name, 'Key': source_key})
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', 'NotFound', '404', 'PreconditionFailed', '412'):
+            return False
+        raise
+
+
+# Copie dédupliquée : GET conditionnel, puis envoi seulement si le contenu est inconnu du bucket
+def _mirror_with_dedup(http, url, bucket_name, s3_file_name, index):
+    known = index.get_url(url)
+    headers = {}
+    if known and known['bucket'] == bucket_name:
+        if known['etag']:
+            headers['If-None-Match'] = known['etag']
+        if known['last_modified']:
+            headers['If-Modified-Since'] = known['last_modified']
+    response = http.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    if response.status_code == 304:
+        # Source inchangée : rien à télécharger
+        if _copy_existing(bucket_name, known['s3_key'], s3_file_name, known['content_hash']):
+            index.record(url, known['etag'], known['last_modified'], known['content_hash'], bucket_name,
+                         s3_file_name)
+            return 0, 'unchanged' if known['s3_key'] == s3_file_name else 'copied'
+        response = http.get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    existing_key = index.find_object(content_hash, bucket_name)
+    if existing_key and _copy_existing(bucket_name, existing_key, s3_file_name, content_hash):
+        outcome = 'duplicate' if existing_key == s3_file_name else 'copied'
+    else:
+        s3_client().put_object(Bucket=bucket_name, Key=s3_file_name, Body=response.content,
+                               Metadata={HASH_METADATA: content_hash})
+        outcome = 'uploaded'
+    index.record(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), content_hash,
+                 bucket_name, s3_file_name)
+    return len(response.content), outcome
+
+
+# Copie d'une URL vers S3 avec reprises (backoff exponentiel avec jitter)
+def _mirror_file(http, url, bucket_name, s3_file_name, report, retries, stream=False, dedup_index=None):
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            outcome = 'uploaded'
+            if dedup_index is not None and not stream:
+                size, outcome = _mirror_with_dedup(http, url, bucket_name, s3_file_name, dedup_index)
+            elif stream:
+                with http.get(url, stream=True, timeout=HTTP_TIMEOUT) as response:
+                    response.raise_for_status()
+                    size = stream_to_s3(response, bucket_name, s3_file_name)
+            else:
+                response = http.get(url, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+                s3_client().put_object(Bucket=bucket_name, Key=s3_file_name, Body=response.content)
+                size = len(response.content)
+            report.record(size, time.perf_counter() - start, outcome)
+            return
+        except NoCredentialsError:
+            raise
+        except Exception as e:
+            if attempt == retries or _is_permanent_error(e):
+                report.record_failure()
+                logger.error("Erreur lors de la copie de %s vers %s/%s: %s", url, bucket_name, s3_file_name, e)
+                return
+            report.record_retry()
+            time.sleep(backoff_delay(attempt, base=0.2, cap=10.0))
+
+
+# Copie en lot de paires (url, clé) : téléchargements via une session HTTP partagée, envois sur un pool borné
+# `dedup_index` (DedupIndex) évite de retélécharger ou de renvoyer les fichiers déjà copiés (hors mode flux)
+def upload_files_to_s3(pairs, bucket_name, max_workers=16, retries=3, stream=False, dedup_index=None):
+    report = UploadReport()
+    http = create_http_session(max_workers)
+    start = time.perf_counter()
+    in_flight = set()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for url, s3_file_name in pairs:
+                # Nombre de copies en attente borné : la liste peut être un flux de taille quelconque
+                if len(in_flight) >= max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(executor.submit(_mirror_file, http, url, bucket_name, s3_file_name, report, retries,
+                                               stream, dedup_index))
+            for future in in_flight:
+                future.result()
+    except NoCredentialsError:
+        logger.error("Erreur: Identifiants AWS non trouvés")
+    finally:
+        http.close()
+    summary = report.summary(time.perf_counter() - start)
+    logger.info("%s fichiers copiés (%s échecs) en %.1fs : %.1f fichiers/s, %.1f Mo/s, "
+                "latence p50=%.0fms p95=%.0fms p99=%.0fms, résultats %s",
+                summary['items'], summary['failed'], summary['seconds'], summary['items_per_second'],
+                summary['mb_per_second'], summary['latency_p50'] * 1000, summary['latency_p95'] * 1000,
+                summary['latency_p99'] * 1000, summary['outcomes'], extra=SUCCESS)
+    return summary
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Copie de fichiers depuis des URLs vers S3")
+    parser.add_argument('list_file', nargs='?', help="Fichier de paires 'url<TAB>clé' à copier en lot")
+    parser.add_argument('--bucket', default="s3-aws-123")  # Remplacez par le nom de votre bucket S3
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--stream', action='store_true', help="Upload multipart en flux pour les gros fichiers")
+    parser.add_argument('--dedup-db', help="Base SQLite de déduplication (URLs et empreintes déjà copiées)")
+    parser.add_argument('--log-format', choices=['console', 'json', 'quiet'], default='console')
+    args = parser.parse_args()
+    configure_logging(args.log_format)
+
+    if args.list_file:
+        dedup_index = DedupIndex(args.dedup_db) if args.dedup_db else None
+        try:
+            upload_files_to_s3(read_upload_list(args.list_file), args.bucket, args.workers, args.retries, args.stream,
+                               dedup_index)
+        finally:
+            if dedup_index is not None:
+                dedup_index.close()
+        return
+
     url = "https://via.placeholder.com/300x300"  # URL de l'image placeholder 300x300
-    bucket_name = "s3-aws-123"  # Remplacez par le nom de votre bucket S3
     s3_file_name = "placeholder_image_300x300.png"  # Nom du fichier dans S3
 
-    upload_file_to_s3(url, bucket_name, s3_file_name)
+    upload_file_to_s3(url, args.bucket, s3_file_name)
 
 
 if __name__ == "__main__":
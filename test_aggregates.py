@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from aggregates import (TOTAL, STATS_SHARDS, merge_deltas, merge_shards, movie_deltas, shard_key, stat_key,
+                        stats_item, stats_updates, summarize, unshard_key)
+
+
+def test_movie_deltas_cancel_out_on_removal():
+    movie = {'genre': 'Drama', 'release_year': 2000, 'rating': Decimal('7.5')}
+    total = merge_deltas({}, movie_deltas(movie))
+    merge_deltas(total, movie_deltas(movie, -1))
+    assert set(total) == {TOTAL, 'genre#Drama', 'year#2000'}
+    assert all(delta == 0 for attributes in total.values() for delta in attributes.values())
+
+
+def test_movie_deltas_of_missing_version_are_empty():
+    assert movie_deltas(None) == {}
+    assert movie_deltas(None, -1) == {}
+
+
+def test_rating_histogram_ignores_decimal_representation():
+    total = merge_deltas({}, movie_deltas({'rating': Decimal('8.80')}))
+    merge_deltas(total, movie_deltas({'rating': 8.8}))
+    assert total[TOTAL]['rating#8.8'] == 2
+
+
+def test_summarize_keeps_exact_min_and_max_after_removal():
+    total = {}
+    for rating in (3, 5, 9):
+        merge_deltas(total, movie_deltas({'rating': rating}))
+    merge_deltas(total, movie_deltas({'rating': 9}, -1))
+    stats = summarize(stats_item(TOTAL, total[TOTAL]))
+    assert stats['count'] == 2
+    assert stats['rating_sum'] == 8
+    assert (stats['rating_min'], stats['rating_max']) == (3, 5)
+
+
+def test_summarize_of_missing_item():
+    assert summarize(None) == {'count': 0, 'rating_count': 0, 'rating_sum': 0, 'rating_avg': None,
+                               'rating_min': None, 'rating_max': None}
+
+
+def test_merge_shards_sums_fragments():
+    key = stat_key('genre', 'Drama')
+    items = [stats_item(shard_key(key, shard), {'movie_count': 1, 'rating_count': 1, 'rating_sum': Decimal(shard)})
+             for shard in range(3)]
+    merged = merge_shards(key, items)
+    assert summarize(merged)['count'] == 3
+    assert summarize(merged)['rating_sum'] == 3
+    assert merge_shards(key, []) is None
+
+
+def test_unshard_key():
+    assert unshard_key(shard_key('genre#Sci-Fi', 4)) == 'genre#Sci-Fi'
+    assert unshard_key(shard_key(TOTAL, 0)) == TOTAL
+
+
+def test_stats_updates_skip_null_deltas_and_target_one_shard():
+    updates = stats_updates('MovieStats', {TOTAL: {'movie_count': 1, 'rating_count': 0},
+                                           'year#2000': {'movie_count': 0}})
+    assert len(updates) == 1
+    update = updates[0]
+    assert update['UpdateExpression'] == "ADD #a0 :v0"
+    assert update['ExpressionAttributeNames'] == {'#a0': 'movie_count'}
+    assert update['Key']['stat'] in {shard_key(TOTAL, shard) for shard in range(STATS_SHARDS)}
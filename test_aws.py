@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+
+import aws
+
+
+def movie(movie_id, release_year, genre, rating):
+    return {'movie_id': movie_id, 'title': f"Film {movie_id}", 'release_year': release_year, 'genre': genre,
+            'rating': Decimal(str(rating)), 'details': {}}
+
+
+@pytest.fixture
+def db(aws_environment):
+    return aws.DynamoDB(schema_mode='recreate')
+
+
+# Agrégats sans les groupes vidés (gardés à zéro par les deltas, absents après une reconstruction)
+def non_empty(stats):
+    return dict(stats, genres={genre: group for genre, group in stats['genres'].items() if group['count']},
+                years={year: group for year, group in stats['years'].items() if group['count']})
+
+
+# Les agrégats tenus par deltas doivent être identiques à ceux recalculés par un scan complet
+def assert_stats_match_rebuild(db):
+    maintained = non_empty(db.get_all_movie_stats())
+    db.rebuild_stats()
+    assert maintained == db.get_all_movie_stats()
+    return maintained
+
+
+def test_single_writes_maintain_stats(db):
+    db.insert_movie('a', 'A', 2000, 'Drama', Decimal('7'), {})
+    db.insert_movie('b', 'B', 2001, 'Drama', Decimal('5'), {})
+    db.insert_movie('c', 'C', 2001, 'Comedy', Decimal('9'), {})
+    # Remplacement : l'ancienne version est retirée des agrégats
+    db.insert_movie('a', 'A', 2000, 'Comedy', Decimal('6'), {})
+    db.update_movie_rating('b', 2001, Decimal('8'))
+    db.delete_movie('c', 2001)
+    stats = assert_stats_match_rebuild(db)
+    assert stats['total']['count'] == 2
+    assert stats['total']['rating_sum'] == 14
+    assert stats['genres']['Drama']['count'] == 1
+    assert stats['genres']['Comedy']['rating_max'] == 6
+    assert stats['years'][2001]['rating_min'] == 8
+
+
+def test_update_of_missing_movie_leaves_stats_unchanged(db):
+    db.insert_movie('a', 'A', 2000, 'Drama', Decimal('7'), {})
+    db.update_movie_rating('missing', 2000, Decimal('3'))
+    assert assert_stats_match_rebuild(db)['total']['count'] == 1
+
+
+def test_batch_writes_count_replaced_movies_once(db):
+    db.insert_movies_batch([movie(f"m{i}", 2000 + i % 3, 'Drama' if i % 2 else 'Comedy', i % 10)
+                            for i in range(30)])
+    # Une partie des films est remplacée avec une autre note et un autre genre
+    db.bulk_insert_movies([movie(f"m{i}", 2000 + i % 3, 'Horror', 5) for i in range(20, 40)], max_workers=4)
+    stats = assert_stats_match_rebuild(db)
+    assert stats['total']['count'] == 40
+    assert stats['genres']['Horror']['count'] == 20
+
+
+def test_delete_movies_maintains_stats(db):
+    db.insert_movies_batch([movie(f"m{i}", 2000 + i % 2, 'Drama' if i % 3 else 'Comedy', i % 10)
+                            for i in range(30)])
+    db.delete_movies(genre='Drama', max_workers=4)
+    stats = assert_stats_match_rebuild(db)
+    assert stats['total']['count'] == 10
+    assert 'Drama' not in stats['genres']
+    assert db.get_movie_stats(genre='Comedy')['count'] == 10
+
+
+def test_writes_without_stats_table(aws_environment):
+    db = aws.DynamoDB()
+    db.create_table_with_additional_gsi()
+    db.insert_movie('a', 'A', 2000, 'Drama', Decimal('7'), {})
+    db.insert_movies_batch([movie('b', 2000, 'Drama', 5)])
+    assert db.count_total_movies() == 2
+    assert db.rebuild_stats()['count'] == 2
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+import pytest
+
+import aws
+from pagination import ResultPage, decode_cursor, encode_cursor, prefetch_pages
+
+
+def test_cursor_round_trip():
+    last_key = {'movie_id': 'm1', 'release_year': Decimal(2000), 'genre': 'Drama'}
+    cursor = encode_cursor('query_movies_by_genre', ('Drama',), last_key)
+    assert cursor.isascii() and '=' not in cursor
+    assert decode_cursor('query_movies_by_genre', ('Drama',), cursor) == last_key
+
+
+def test_last_page_has_no_cursor():
+    assert encode_cursor('query_movies_by_genre', ('Drama',), None) is None
+    assert encode_cursor('query_movies_by_genre', ('Drama',), {}) is None
+
+
+def test_cursor_is_bound_to_its_query():
+    cursor = encode_cursor('query_movies_by_genre', ('Drama',), {'movie_id': 'm1'})
+    with pytest.raises(ValueError):
+        decode_cursor('query_movies_by_genre', ('Comedy',), cursor)
+    with pytest.raises(ValueError):
+        decode_cursor('query_movies_by_release_year_gsi', ('Drama',), cursor)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('query_movies_by_genre', ('Drama',), 'pas-un-curseur')
+
+
+def test_prefetch_pages_follows_cursors():
+    pages = {None: ResultPage([1, 2], 'c1'), 'c1': ResultPage([3], 'c2'), 'c2': ResultPage([4])}
+    assert [list(page) for page in prefetch_pages(pages.get)] == [[1, 2], [3], [4]]
+    assert [list(page) for page in prefetch_pages(pages.get, 'c2')] == [[4]]
+
+
+@pytest.fixture(params=[0, 100], ids=['sans cache', 'avec cache'])
+def db(aws_environment, request):
+    db = aws.DynamoDB(schema_mode='recreate', cache_size=request.param, maintain_stats=False)
+    db.insert_movies_batch([{'movie_id': f"m{i:02}", 'title': f"Film {i}", 'release_year': 2000 + i % 5,
+                             'genre': 'Drama' if i % 4 else 'Comedy', 'rating': Decimal(i % 10), 'details': {}}
+                            for i in range(40)])
+    return db
+
+
+# Parcours complet d'une requête GSI page par page, en repartant à chaque fois du curseur renvoyé
+def test_query_pages_round_trip(db):
+    seen = []
+    cursor = None
+    while True:
+        page = db.query_movies_by_genre('Drama', page_size=7, cursor=cursor)
+        assert len(page) <= 7
+        seen.extend(item['movie_id'] for item in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 30
+    assert {item['movie_id'] for item in db.query_movies_by_genre('Drama')} == set(seen)
+
+
+def test_iter_index_pages_resumes_from_cursor(db):
+    pages = list(db.iter_index_pages('query_movies_by_genre', 'Drama', page_size=8))
+    assert sum(len(page) for page in pages) == 30
+    resumed = list(db.iter_index_pages('query_movies_by_genre', 'Drama', page_size=8, cursor=pages[0].next_cursor))
+    assert [list(page) for page in resumed] == [list(page) for page in pages[1:]]
+
+
+def test_cursor_from_another_query_is_rejected(db):
+    cursor = db.query_movies_by_genre('Drama', page_size=5).next_cursor
+    with pytest.raises(ValueError):
+        list(db.iter_index_pages('query_movies_by_genre', 'Comedy', cursor=cursor))
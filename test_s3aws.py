@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import s3aws
+
+BUCKET = 'movies-test'
+
+
+# Serveur HTTP local : contenus modifiables par chemin, ETag égal au contenu et réponses 304 conditionnelles
+@pytest.fixture
+def http_server():
+    contents = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = contents[self.path]
+            etag = '"' + body.decode() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", contents
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def bucket(aws_environment):
+    s3aws.s3_client().create_bucket(Bucket=BUCKET, CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+    return BUCKET
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = s3aws.DedupIndex(str(tmp_path / 'dedup.sqlite'))
+    yield index
+    index.close()
+
+
+def upload(url, key, index):
+    return s3aws.upload_files_to_s3([(url, key)], BUCKET, dedup_index=index)['outcomes']
+
+
+def read(key):
+    return s3aws.s3_client().get_object(Bucket=BUCKET, Key=key)['Body'].read()
+
+
+def test_duplicate_content_is_copied(http_server, bucket, index):
+    base, contents = http_server
+    contents['/a'] = contents['/b'] = b'AAAA'
+    assert upload(base + '/a', 'K', index) == {'uploaded': 1}
+    assert upload(base + '/b', 'K2', index) == {'copied': 1}
+    assert read('K2') == b'AAAA'
+
+
+def test_unchanged_source_is_not_uploaded_again(http_server, bucket, index):
+    base, contents = http_server
+    contents['/a'] = b'AAAA'
+    upload(base + '/a', 'K', index)
+    assert upload(base + '/a', 'K', index) == {'unchanged': 1}
+
+
+def test_overwritten_key_is_no_longer_a_copy_source(http_server, bucket, index):
+    base, contents = http_server
+    contents['/a'] = b'AAAA'
+    contents['/b'] = b'BBBB'
+    upload(base + '/a', 'K', index)
+    # K contient désormais le contenu de /b : /a ne doit plus être copié depuis K
+    upload(base + '/b', 'K', index)
+    assert upload(base + '/a', 'K2', index) == {'uploaded': 1}
+    assert read('K2') == b'AAAA'
+    assert read('K') == b'BBBB'
+
+
+def test_key_changed_outside_the_index_is_not_copied(http_server, bucket, index):
+    base, contents = http_server
+    contents['/a'] = contents['/c'] = b'AAAA'
+    upload(base + '/a', 'K', index)
+    s3aws.s3_client().put_object(Bucket=BUCKET, Key='K', Body=b'ZZZZ')
+    assert upload(base + '/c', 'K2', index) == {'uploaded': 1}
+    assert read('K2') == b'AAAA'
+
+
+def test_index_maps_each_key_to_its_last_content(index):
+    index.record('u1', None, None, 'h1', BUCKET, 'K')
+    index.record('u2', None, None, 'h2', BUCKET, 'K')
+    assert index.find_object('h1', BUCKET) is None
+    assert index.find_object('h2', BUCKET) == 'K'
+    assert index.get_url('u1')['content_hash'] == 'h1'